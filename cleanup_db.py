@@ -17,19 +17,43 @@ Set env var or edit CRED_PATH below to point to your Firebase service account JS
 import os
 import sys
 import argparse
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
-from collections import defaultdict
 
 import firebase_admin
 from firebase_admin import credentials, firestore
+from google.cloud.firestore_v1.bulk_writer import BulkWriterOptions
+from google.cloud.firestore_v1.field_path import FieldPath
 
 # ── Config ─────────────────────────────────────────────────────────────────────
 CRED_PATH = os.getenv("FIREBASE_CREDENTIALS", "serviceAccountKey.json")
 MAX_AGE_DAYS = 14
-BATCH_SIZE = 400  # Firestore max is 500; keep headroom
+QUERY_WORKERS = 10  # Parallel server-side queries
+IN_QUERY_LIMIT = 30  # Max values in a Firestore "in" filter
+PAGE_SIZE = 500  # Docs per cursor-paginated query page
+PROGRESS_EVERY = 400  # Print delete progress every N docs
 # ───────────────────────────────────────────────────────────────────────────────
 
+# BulkWriter ramps up from the initial rate (500/50/5 rule) towards the max
+BULK_WRITER_OPTIONS = BulkWriterOptions(initial_ops_per_second=500, max_ops_per_second=10000)
+
+
+def _to_utc(value, _tz=timezone.utc, _dt=datetime):
+    """Timezone-aware datetime for Firestore timestamps (naive ones assumed UTC), else None."""
+    if isinstance(value, _dt):
+        return value if value.tzinfo else value.replace(tzinfo=_tz)
+    return None
+
+
+def _field(doc, path: str):
+    """Single field from a DocumentSnapshot without materialising the whole doc, or None."""
+    try:
+        return doc.get(path)
+    except KeyError:
+        return None
+
 
 def init_firebase():
     cred = credentials.Certificate(CRED_PATH)
@@ -37,88 +61,168 @@ def init_firebase():
     return firestore.client()
 
 
-def commit_batch(db, refs: list, dry_run: bool, label: str) -> int:
-    """Delete a list of DocumentReferences in batches."""
-    if not refs:
-        return 0
-    if dry_run:
-        print(f"  [DRY RUN] Would delete {len(refs)} {label}")
-        return len(refs)
+class StreamingDeleter:
+    """
+    Deletes DocumentReferences as they are added instead of collecting them
+    all first. Deletes go through a BulkWriter, which batches, sends in
+    parallel, ramps up throughput and retries failed writes on its own, so
+    memory stays flat regardless of collection size.
+    """
 
-    deleted = 0
-    for i in range(0, len(refs), BATCH_SIZE):
-        batch = db.batch()
-        for ref in refs[i : i + BATCH_SIZE]:
-            batch.delete(ref)
-        batch.commit()
-        deleted += len(refs[i : i + BATCH_SIZE])
-        print(f"  ✓ Deleted {deleted}/{len(refs)} {label}...")
+    def __init__(self, db, dry_run: bool, label: str):
+        self.db = db
+        self.dry_run = dry_run
+        self.label = label
+        self.count = 0
+        self.deleted = 0
+        self._writer = None
+        # Write-result callbacks run on the BulkWriter's worker threads
+        self._lock = threading.Lock()
+
+    def add(self, ref):
+        self.count += 1
+        if self.dry_run:
+            return
+        if self._writer is None:
+            self._writer = self.db.bulk_writer(options=BULK_WRITER_OPTIONS)
+            self._writer.on_write_result(self._on_deleted)
+        self._writer.delete(ref)
+
+    def _on_deleted(self, ref, result, writer):
+        with self._lock:
+            self.deleted += 1
+            if self.deleted % PROGRESS_EVERY == 0:
+                print(f"  ✓ Deleted {self.deleted}/{self.count} {self.label}...")
+
+    def flush(self) -> int:
+        """Send whatever is queued and wait for every delete to finish."""
+        if self.dry_run:
+            if self.count:
+                print(f"  [DRY RUN] Would delete {self.count} {self.label}")
+            return self.count
+
+        if self._writer is None:
+            return 0
+
+        self._writer.close()
+        self._writer = None
+        print(f"  ✓ Deleted {self.deleted}/{self.count} {self.label}")
+        return self.deleted
+
+
+def paginate(query, order_field: str = "__name__", page_size: int = PAGE_SIZE):
+    """
+    Yield a query's documents page by page with start_after cursors, so no
+    single RPC has to stream the whole result set. Range-filtered queries
+    must be ordered by their inequality field.
+    """
+    query = query.order_by(order_field).limit(page_size)
+    last = None
+    while True:
+        page = list((query.start_after(last) if last else query).stream())
+        yield from page
+        if len(page) < page_size:
+            return
+        last = page[-1]
 
-    return deleted
 
+def stream_parallel(fetches: list) -> list:
+    """Run several document fetches concurrently; returns one snapshot list per fetch."""
+    if not fetches:
+        return []
+    with ThreadPoolExecutor(max_workers=min(QUERY_WORKERS, len(fetches))) as executor:
+        return list(executor.map(lambda fetch: list(fetch()), fetches))
 
-def step1_delete_stale_jobs(db, dry_run: bool):
+
+def step1_and_step3(db, dry_run: bool):
     """
-    Delete jobs that are either:
+    Single pass over the jobs collection covering both job steps.
+
+    Step 1 deletes jobs that are either:
       a) Have expiresAt < now  (properly expired)
       b) Have postedAt older than MAX_AGE_DAYS  (scraped before expiresAt was added)
       c) Missing postedAt entirely  (bad data)
-    Returns the set of deleted job IDs so step 2 can clean matches.
+    Step 3 groups the surviving jobs by (company, title), keeps the newest
+    one and deletes the rest.
+
+    Returns (stale_ids, dup_ids) so step 2 can clean matches.
     """
     print(f"\n── Step 1: Stale Job Cleanup (older than {MAX_AGE_DAYS} days) ──────────────")
-    cutoff = datetime.now(timezone.utc) - timedelta(days=MAX_AGE_DAYS)
-    now = datetime.now(timezone.utc)
+    tz = timezone.utc
+    now = datetime.now(tz)
+    cutoff = now - timedelta(days=MAX_AGE_DAYS)
+    oldest = datetime.min.replace(tzinfo=tz)
 
-    all_jobs = db.collection("jobs").stream()
+    # Only these fields are ever read, so project everything else away
+    jobs = db.collection("jobs")
+    all_jobs = paginate(jobs.select(["postedAt", "expiresAt", "company", "title"]))
 
-    stale_refs = []
+    stale_deleter = StreamingDeleter(db, dry_run, "stale jobs")
     stale_ids = set()
+    dup_deleter = StreamingDeleter(db, dry_run, "duplicate jobs")
+    dup_ids = set()
+    # key → (doc_id, posted_at) of the newest job seen so far. Holding the id
+    # string rather than the DocumentReference keeps this table small; the
+    # ref is only rebuilt for the rare entry that gets displaced.
+    best = {}
+    dup_keys = set()
+
+    # Bound once; these are called for every doc in the collection
+    stale_add = stale_deleter.add
+    stale_ids_add = stale_ids.add
+    dup_add = dup_deleter.add
+    dup_ids_add = dup_ids.add
+    dup_keys_add = dup_keys.add
+    best_get = best.get
 
     for doc in all_jobs:
-        data = doc.to_dict()
         ref = doc.reference
-        job_id = doc.id
 
-        expires_at = data.get("expiresAt")
-        posted_at = data.get("postedAt")
+        expires_at = _field(doc, "expiresAt")
+        posted_at = _field(doc, "postedAt")
+        exp_dt = _to_utc(expires_at)
+        posted_dt = _to_utc(posted_at)
 
         # Case A: expiresAt exists and is in the past
-        if expires_at:
-            exp = expires_at if isinstance(expires_at, datetime) else expires_at.replace(tzinfo=timezone.utc) if hasattr(expires_at, 'replace') else None
-            try:
-                exp_dt = expires_at.astimezone(timezone.utc) if hasattr(expires_at, 'astimezone') else None
-                if exp_dt and exp_dt < now:
-                    stale_refs.append(ref)
-                    stale_ids.add(job_id)
-                    continue
-            except Exception:
-                pass
-
         # Case B: postedAt is too old
-        if posted_at:
-            try:
-                if hasattr(posted_at, 'astimezone'):
-                    posted_dt = posted_at.astimezone(timezone.utc)
-                elif hasattr(posted_at, 'replace'):
-                    posted_dt = posted_at.replace(tzinfo=timezone.utc)
-                else:
-                    posted_dt = None
-
-                if posted_dt and posted_dt < cutoff:
-                    stale_refs.append(ref)
-                    stale_ids.add(job_id)
-                    continue
-            except Exception:
-                pass
-
         # Case C: missing postedAt entirely — treat as stale
-        if not posted_at and not expires_at:
-            stale_refs.append(ref)
-            stale_ids.add(job_id)
+        if (
+            (exp_dt is not None and exp_dt < now)
+            or (posted_dt is not None and posted_dt < cutoff)
+            or (not posted_at and not expires_at)
+        ):
+            stale_add(ref)
+            stale_ids_add(doc.id)
+            continue
+
+        # Not stale — candidate for step 3 deduplication
+        company = (_field(doc, "company") or "").strip().lower()
+        title = (_field(doc, "title") or "").strip().lower()
+        key = f"{company}::{title}"
+        posted_dt = posted_dt or oldest
+
+        # Keep the newest per key; whichever entry loses is a duplicate
+        prev = best_get(key)
+        if prev is None:
+            best[key] = (doc.id, posted_dt)
+            continue
+        dup_keys_add(key)
+        if posted_dt > prev[1]:
+            best[key] = (doc.id, posted_dt)
+            dup_add(jobs.document(prev[0]))
+            dup_ids_add(prev[0])
+        else:
+            dup_add(ref)
+            dup_ids_add(doc.id)
+
+    print(f"  Found {stale_deleter.count} stale jobs to delete")
+    stale_deleter.flush()
+
+    print(f"\n── Step 3: Deduplication (same company + title) ────────────────────────────")
+    print(f"  Found {len(dup_keys)} duplicate groups → {dup_deleter.count} excess copies to delete")
+    dup_deleter.flush()
 
-    print(f"  Found {len(stale_refs)} stale jobs to delete")
-    deleted = commit_batch(db, stale_refs, dry_run, "stale jobs")
-    return stale_ids
+    return stale_ids, dup_ids
 
 
 def step2_delete_orphaned_matches(db, stale_job_ids: set, dry_run: bool):
@@ -130,92 +234,48 @@ def step2_delete_orphaned_matches(db, stale_job_ids: set, dry_run: bool):
     print(f"\n── Step 2: Orphaned Match Cleanup ──────────────────────────────────────────")
     cutoff = datetime.now(timezone.utc) - timedelta(days=MAX_AGE_DAYS)
 
-    all_matches = db.collection("user_job_matches").stream()
-
-    orphan_refs = []
-
-    for doc in all_matches:
-        data = doc.to_dict()
-        job_id = data.get("jobId", "")
-        created_at = data.get("createdAt") or data.get("notifiedAt")
-
-        # Case A: points to a deleted job
-        if job_id in stale_job_ids:
-            orphan_refs.append(doc.reference)
-            continue
-
-        # Case B: match itself is old
-        if created_at:
-            try:
-                if hasattr(created_at, 'astimezone'):
-                    created_dt = created_at.astimezone(timezone.utc)
-                elif hasattr(created_at, 'replace'):
-                    created_dt = created_at.replace(tzinfo=timezone.utc)
-                else:
-                    created_dt = None
-
-                if created_dt and created_dt < cutoff:
-                    orphan_refs.append(doc.reference)
-            except Exception:
-                pass
-
-    print(f"  Found {len(orphan_refs)} orphaned matches to delete")
-    commit_batch(db, orphan_refs, dry_run, "orphaned matches")
-
-
-def step3_deduplicate_jobs(db, dry_run: bool):
-    """
-    For jobs sharing the same (company, title), keep the newest one
-    and delete the rest.
-    """
-    print(f"\n── Step 3: Deduplication (same company + title) ────────────────────────────")
-
-    # Fetch remaining (non-stale) jobs
-    all_jobs = db.collection("jobs").stream()
-
-    groups = defaultdict(list)  # key → list of (doc_id, ref, posted_at)
-
-    for doc in all_jobs:
-        data = doc.to_dict()
-        company = (data.get("company") or "").strip().lower()
-        title = (data.get("title") or "").strip().lower()
-        key = f"{company}::{title}"
-
-        posted_at = data.get("postedAt")
-        try:
-            if hasattr(posted_at, 'astimezone'):
-                posted_dt = posted_at.astimezone(timezone.utc)
-            else:
-                posted_dt = datetime.min.replace(tzinfo=timezone.utc)
-        except Exception:
-            posted_dt = datetime.min.replace(tzinfo=timezone.utc)
-
-        groups[key].append((doc.id, doc.reference, posted_dt))
-
-    dup_refs = []
-    dup_groups = 0
-
-    for key, entries in groups.items():
-        if len(entries) < 2:
-            continue
-        dup_groups += 1
-        # Sort newest first, keep index 0, delete the rest
-        entries.sort(key=lambda x: x[2], reverse=True)
-        for doc_id, ref, _ in entries[1:]:
-            dup_refs.append(ref)
-
-    print(f"  Found {dup_groups} duplicate groups → {len(dup_refs)} excess copies to delete")
-    commit_batch(db, dup_refs, dry_run, "duplicate jobs")
-
-    # Also clean up matches pointing to now-deleted duplicate job IDs
-    if not dry_run and dup_refs:
-        print("  Cleaning matches for deleted duplicates...")
-        # Collect the IDs we just deleted
-        deleted_ids = set()
-        # We need the IDs — re-derive from refs
-        for ref in dup_refs:
-            deleted_ids.add(ref.id)
-        step2_delete_orphaned_matches(db, deleted_ids, dry_run=False)
+    matches = db.collection("user_job_matches")
+
+    # Only refs are needed, so project as little as possible: the document name
+    # for the jobId lookups (an empty select() returns every field), and just
+    # the cursor field(s) for the paginated range queries
+    stale_ids = list(stale_job_ids)
+    job_id_queries = [
+        matches.where("jobId", "in", stale_ids[i : i + IN_QUERY_LIMIT]).select([FieldPath.document_id()])
+        for i in range(0, len(stale_ids), IN_QUERY_LIMIT)
+    ]
+
+    created_docs, notified_docs, *job_id_results = stream_parallel([
+        lambda: paginate(matches.where("createdAt", "<", cutoff).select(["createdAt"]), "createdAt"),
+        lambda: paginate(
+            matches.where("notifiedAt", "<", cutoff).select(["notifiedAt", "createdAt"]), "notifiedAt"
+        ),
+        *[query.stream for query in job_id_queries],
+    ])
+
+    orphan_deleter = StreamingDeleter(db, dry_run, "orphaned matches")
+    seen = set()  # paths already queued, since the queries can overlap
+
+    def add_orphan(doc):
+        path = doc.reference.path
+        if path not in seen:
+            seen.add(path)
+            orphan_deleter.add(doc.reference)
+
+    # Case A: points to a deleted job
+    for docs in job_id_results:
+        for doc in docs:
+            add_orphan(doc)
+
+    # Case B: match itself is old (notifiedAt only counts when createdAt is absent)
+    for doc in created_docs:
+        add_orphan(doc)
+    for doc in notified_docs:
+        if not _field(doc, "createdAt"):
+            add_orphan(doc)
+
+    print(f"  Found {orphan_deleter.count} orphaned matches to delete")
+    orphan_deleter.flush()
 
 
 def main():
@@ -235,9 +295,9 @@ def main():
     start = time.time()
     db = init_firebase()
 
-    stale_ids = step1_delete_stale_jobs(db, args.dry_run)
-    step2_delete_orphaned_matches(db, stale_ids, args.dry_run)
-    step3_deduplicate_jobs(db, args.dry_run)
+    stale_ids, dup_ids = step1_and_step3(db, args.dry_run)
+    # Clean matches pointing at both stale and deduplicated jobs in one pass
+    step2_delete_orphaned_matches(db, stale_ids | dup_ids, args.dry_run)
 
     print(f"\n✅ Done in {time.time() - start:.1f}s")
 
@@ -1,14 +1,16 @@
 import functions_framework
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+import httpx
+import orjson
+from selectolax.lexbor import LexborHTMLParser
 import json
 import hashlib
-from urllib.parse import urljoin, urlparse
-from datetime import datetime
-import time
+from urllib.parse import urljoin, urlparse, parse_qs
+from datetime import datetime, timezone
 import random
+import re
+import threading
 from google.cloud import firestore
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
 
 # Initialize Firestore
@@ -21,95 +23,169 @@ logger = logging.getLogger(__name__)
 # Request settings
 REQUEST_DELAY = 2
 MAX_RETRIES = 3
+MAX_CONCURRENT_SCRAPES = 10
 USER_AGENTS = [
     'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
     'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
     'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36',
 ]
+DEFAULT_HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Upgrade-Insecure-Requests': '1'
+}
 
-def safe_request(url, retries=MAX_RETRIES):
+# Job container selectors per board; the rest of the page is never wrapped in Python nodes
+GREENHOUSE_JOB_SELECTORS = ('div.opening', 'section.level-0')
+LEVER_JOB_SELECTOR = 'div.posting'
+JOB_HREF_RE = re.compile(r'/jobs?/')
+
+# Public JSON APIs for boards that expose one; no HTML parsing needed
+GREENHOUSE_API_URL = 'https://boards-api.greenhouse.io/v1/boards/{token}/jobs'
+LEVER_API_URL = 'https://api.lever.co/v0/postings/{company}?mode=json'
+WORKABLE_JOB_SELECTOR = 'li.job'
+
+# Firestore settings
+GET_ALL_CHUNK_SIZE = 300
+writer_lock = threading.Lock()
+
+# One event loop + HTTP client per instance, so pooled connections and TLS
+# sessions survive across warm invocations instead of being rebuilt each time
+_loop = None
+_loop_lock = threading.Lock()
+_http_client = None
+
+def run_async(coro):
+    """Run a coroutine on the instance-wide event loop and wait for its result"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _loop).result()
+
+def get_http_client():
+    """Pooled HTTP/2 client shared by every request; only use from the run_async loop"""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            headers=DEFAULT_HEADERS,
+            timeout=15,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+        )
+    return _http_client
+
+async def safe_request(client, url, retries=MAX_RETRIES):
     """Make HTTP request with retries and error handling"""
-    headers = {
-        'User-Agent': random.choice(USER_AGENTS),
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1'
-    }
+    headers = {'User-Agent': random.choice(USER_AGENTS)}
     
     for attempt in range(retries):
         try:
-            time.sleep(REQUEST_DELAY + random.uniform(0, 2))
-            response = requests.get(url, headers=headers, timeout=15)
+            await asyncio.sleep(REQUEST_DELAY + random.uniform(0, 2))
+            response = await client.get(url, headers=headers)
             response.raise_for_status()
             return response
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.warning(f"Attempt {attempt + 1}/{retries} failed for {url}: {e}")
             if attempt == retries - 1:
                 logger.error(f"All retries failed for {url}")
                 return None
-            time.sleep(5 * (attempt + 1))
+            await asyncio.sleep(5 * (attempt + 1))
+    return None
+
+def make_job_id(link):
+    """Stable job document ID derived from the job URL (dedup key, not a security hash)"""
+    return hashlib.md5(link.encode(), usedforsecurity=False).hexdigest()
+
+def node_text(node, **kwargs):
+    """Stripped text content of a selectolax node"""
+    return node.text(strip=True, **kwargs).strip()
+
+def find_next(node, tags):
+    """First element with one of `tags` after `node` in document order"""
+    selector = ', '.join(tags)
+    current = node
+    while current is not None:
+        sibling = current.next
+        while sibling is not None:
+            if sibling.tag in tags:
+                return sibling
+            # Text and comment nodes (Lexbor tags '-text', '-comment') have no descendants
+            if sibling.tag not in ('-text', '-comment'):
+                match = sibling.css_first(selector)
+                if match is not None:
+                    return match
+            sibling = sibling.next
+        current = current.parent
     return None
 
-def scrape_greenhouse(url, company_name, company_id):
+async def scrape_greenhouse(client, url, company_name, company_id):
     """Scrape Greenhouse job boards"""
     jobs = []
-    response = safe_request(url)
+    seen_links = set()
+    now = datetime.now(timezone.utc)
+    response = await safe_request(client, url)
     
     if not response:
         return jobs
     
     try:
-        soup = BeautifulSoup(response.text, 'html.parser')
+        tree = LexborHTMLParser(response.content)
         
         # Find all job sections
-        job_sections = (
-            soup.find_all('div', class_='opening') or
-            soup.find_all('section', class_='level-0') or
+        job_sections = next(
+            (found for found in map(tree.css, GREENHOUSE_JOB_SELECTORS) if found),
             []
         )
         
         # Fallback: find job links
         if not job_sections:
-            all_links = soup.find_all('a', href=True)
+            all_links = tree.css('a[href]')
             job_sections = [
                 link.parent for link in all_links 
-                if '/jobs/' in link.get('href', '') or '/job/' in link.get('href', '')
+                if JOB_HREF_RE.search(link.attributes.get('href') or '')
             ]
         
         for job in job_sections:
-            title_tag = job.find('a') if job.name != 'a' else job
+            title_tag = job.css_first('a') if job.tag != 'a' else job
             
             if not title_tag:
                 continue
             
-            title = title_tag.get_text(strip=True)
+            title = node_text(title_tag)
             
             if not title or len(title) < 3:
                 continue
             
-            link = title_tag.get('href', '')
+            link = title_tag.attributes.get('href') or ''
             if not link:
                 continue
             
             if not link.startswith('http'):
                 link = urljoin(url, link)
             
+            # Skip duplicates before doing any more work on them
+            if link in seen_links:
+                continue
+            seen_links.add(link)
+            
             # Extract location
             location_tag = (
-                job.find('span', class_='location') or 
-                job.find('div', class_='location') or
-                job.find('span', string=lambda t: t and 'remote' in t.lower())
+                job.css_first('span.location') or 
+                job.css_first('div.location') or
+                next((span for span in job.css('span') if 'remote' in span.text().lower()), None)
             )
-            location = location_tag.get_text(strip=True) if location_tag else "Location not specified"
+            location = node_text(location_tag) if location_tag else "Location not specified"
             
             # Extract department (if available)
-            dept_tag = job.find('span', class_='department')
-            department = dept_tag.get_text(strip=True) if dept_tag else None
+            dept_tag = job.css_first('span.department')
+            department = node_text(dept_tag) if dept_tag else None
             
             # Create unique ID
-            job_id = hashlib.md5(link.encode()).hexdigest()
+            job_id = make_job_id(link)
             
             jobs.append({
                 'jobId': job_id,
@@ -122,58 +198,51 @@ def scrape_greenhouse(url, company_name, company_id):
                 'remote': 'remote' in location.lower(),
                 'source': 'greenhouse',
                 'status': 'active',
-                'scrapedAt': firestore.SERVER_TIMESTAMP,
-                'postedAt': firestore.SERVER_TIMESTAMP,
+                'scrapedAt': now,
+                'postedAt': now,
             })
         
-        # Remove duplicates
-        seen_links = set()
-        unique_jobs = []
-        for job in jobs:
-            if job['url'] not in seen_links:
-                seen_links.add(job['url'])
-                unique_jobs.append(job)
-        
-        logger.info(f"Greenhouse scraper found {len(unique_jobs)} jobs for {company_name}")
-        return unique_jobs
+        logger.info(f"Greenhouse scraper found {len(jobs)} jobs for {company_name}")
+        return jobs
         
     except Exception as e:
         logger.error(f"Greenhouse scrape failed for {company_name}: {e}")
         return jobs
 
-def scrape_lever(url, company_name, company_id):
+async def scrape_lever(client, url, company_name, company_id):
     """Scrape Lever.co job boards"""
     jobs = []
-    response = safe_request(url)
+    now = datetime.now(timezone.utc)
+    response = await safe_request(client, url)
     
     if not response:
         return jobs
     
     try:
-        soup = BeautifulSoup(response.text, 'html.parser')
-        job_postings = soup.find_all('div', class_='posting')
+        tree = LexborHTMLParser(response.content)
+        job_postings = tree.css(LEVER_JOB_SELECTOR)
         
         for job in job_postings:
-            title_tag = job.find('h5') or job.find('a', class_='posting-title')
+            title_tag = job.css_first('h5') or job.css_first('a.posting-title')
             
             if not title_tag:
                 continue
             
-            title = title_tag.get_text(strip=True)
+            title = node_text(title_tag)
             
-            link_tag = job.find('a', class_='posting-btn-submit') or title_tag
-            link = link_tag.get('href', '') if link_tag else ''
+            link_tag = job.css_first('a.posting-btn-submit') or title_tag
+            link = (link_tag.attributes.get('href') or '') if link_tag else ''
             
             if not link.startswith('http'):
                 link = urljoin(url, link)
             
-            location_tag = job.find('span', class_='location')
-            location = location_tag.get_text(strip=True) if location_tag else "Location not specified"
+            location_tag = job.css_first('span.location')
+            location = node_text(location_tag) if location_tag else "Location not specified"
             
-            team_tag = job.find('span', class_='posting-categories-team')
-            department = team_tag.get_text(strip=True) if team_tag else None
+            team_tag = job.css_first('span.posting-categories-team')
+            department = node_text(team_tag) if team_tag else None
             
-            job_id = hashlib.md5(link.encode()).hexdigest()
+            job_id = make_job_id(link)
             
             jobs.append({
                 'jobId': job_id,
@@ -186,8 +255,8 @@ def scrape_lever(url, company_name, company_id):
                 'remote': 'remote' in location.lower(),
                 'source': 'lever',
                 'status': 'active',
-                'scrapedAt': firestore.SERVER_TIMESTAMP,
-                'postedAt': firestore.SERVER_TIMESTAMP,
+                'scrapedAt': now,
+                'postedAt': now,
             })
         
         logger.info(f"Lever scraper found {len(jobs)} jobs for {company_name}")
@@ -197,34 +266,35 @@ def scrape_lever(url, company_name, company_id):
         logger.error(f"Lever scrape failed for {company_name}: {e}")
         return jobs
 
-def scrape_workable(url, company_name, company_id):
+async def scrape_workable(client, url, company_name, company_id):
     """Scrape Workable job boards"""
     jobs = []
-    response = safe_request(url)
+    now = datetime.now(timezone.utc)
+    response = await safe_request(client, url)
     
     if not response:
         return jobs
     
     try:
-        soup = BeautifulSoup(response.text, 'html.parser')
-        job_items = soup.find_all('li', class_='job')
+        tree = LexborHTMLParser(response.content)
+        job_items = tree.css(WORKABLE_JOB_SELECTOR)
         
         for job in job_items:
-            title_tag = job.find('a')
+            title_tag = job.css_first('a')
             
             if not title_tag:
                 continue
             
-            title = title_tag.get_text(strip=True)
-            link = title_tag.get('href', '')
+            title = node_text(title_tag)
+            link = title_tag.attributes.get('href') or ''
             
             if not link.startswith('http'):
                 link = urljoin(url, link)
             
-            location_tag = job.find('span', class_='location')
-            location = location_tag.get_text(strip=True) if location_tag else "Location not specified"
+            location_tag = job.css_first('span.location')
+            location = node_text(location_tag) if location_tag else "Location not specified"
             
-            job_id = hashlib.md5(link.encode()).hexdigest()
+            job_id = make_job_id(link)
             
             jobs.append({
                 'jobId': job_id,
@@ -236,8 +306,8 @@ def scrape_workable(url, company_name, company_id):
                 'remote': 'remote' in location.lower(),
                 'source': 'workable',
                 'status': 'active',
-                'scrapedAt': firestore.SERVER_TIMESTAMP,
-                'postedAt': firestore.SERVER_TIMESTAMP,
+                'scrapedAt': now,
+                'postedAt': now,
             })
         
         logger.info(f"Workable scraper found {len(jobs)} jobs for {company_name}")
@@ -247,75 +317,221 @@ def scrape_workable(url, company_name, company_id):
         logger.error(f"Workable scrape failed for {company_name}: {e}")
         return jobs
 
+def greenhouse_board_token(url):
+    """Board token from a Greenhouse board URL, or None if it can't be determined"""
+    parsed = urlparse(url)
+    if not parsed.netloc.endswith('greenhouse.io'):
+        return None
+    # Embedded boards: boards.greenhouse.io/embed/job_board?for=TOKEN
+    token = parse_qs(parsed.query).get('for', [None])[0]
+    if token:
+        return token
+    segments = [segment for segment in parsed.path.split('/') if segment]
+    if segments and segments[0] != 'embed':
+        return segments[0]
+    return None
+
+def lever_company_slug(url):
+    """Company slug from a jobs.lever.co URL, or None if it can't be determined"""
+    parsed = urlparse(url)
+    if parsed.netloc != 'jobs.lever.co':
+        return None
+    segments = [segment for segment in parsed.path.split('/') if segment]
+    return segments[0] if segments else None
+
+async def scrape_greenhouse_api(client, url, company_name, company_id):
+    """Scrape Greenhouse via its public job board API, falling back to HTML"""
+    jobs = []
+    now = datetime.now(timezone.utc)
+    token = greenhouse_board_token(url)
+    api_url = GREENHOUSE_API_URL.format(token=token)
+    response = await safe_request(client, api_url)
+    
+    if not response:
+        return await scrape_greenhouse(client, url, company_name, company_id)
+    
+    try:
+        for posting in orjson.loads(response.content).get('jobs', []):
+            title = (posting.get('title') or '').strip()
+            posting_id = posting.get('id')
+            
+            if not title or not posting_id:
+                continue
+            
+            # absolute_url may point at a custom careers domain; rebuild the
+            # board link the HTML scraper saw so existing job IDs don't change
+            link = urljoin(url, f'/{token}/jobs/{posting_id}')
+            
+            location = ((posting.get('location') or {}).get('name') or '').strip() or "Location not specified"
+            departments = posting.get('departments') or []
+            department = departments[0].get('name') if departments else None
+            
+            jobs.append({
+                'jobId': make_job_id(link),
+                'title': title,
+                'company': company_name,
+                'companyId': company_id,
+                'location': location,
+                'department': department,
+                'url': link,
+                'remote': 'remote' in location.lower(),
+                'source': 'greenhouse',
+                'status': 'active',
+                'scrapedAt': now,
+                'postedAt': now,
+            })
+        
+        logger.info(f"Greenhouse API found {len(jobs)} jobs for {company_name}")
+        return jobs
+        
+    except Exception as e:
+        logger.error(f"Greenhouse API scrape failed for {company_name}: {e}")
+        return jobs
+
+async def scrape_lever_api(client, url, company_name, company_id):
+    """Scrape Lever via its public postings API, falling back to HTML"""
+    jobs = []
+    now = datetime.now(timezone.utc)
+    api_url = LEVER_API_URL.format(company=lever_company_slug(url))
+    response = await safe_request(client, api_url)
+    
+    if not response:
+        return await scrape_lever(client, url, company_name, company_id)
+    
+    try:
+        for posting in orjson.loads(response.content):
+            title = (posting.get('text') or '').strip()
+            # hostedUrl is the posting link the HTML scraper hashed (applyUrl
+            # adds /apply), so job IDs stay stable
+            link = posting.get('hostedUrl') or posting.get('applyUrl') or ''
+            
+            if not title or not link:
+                continue
+            
+            categories = posting.get('categories') or {}
+            location = (categories.get('location') or '').strip() or "Location not specified"
+            
+            jobs.append({
+                'jobId': make_job_id(link),
+                'title': title,
+                'company': company_name,
+                'companyId': company_id,
+                'location': location,
+                'department': categories.get('team'),
+                'url': link,
+                'remote': 'remote' in location.lower(),
+                'source': 'lever',
+                'status': 'active',
+                'scrapedAt': now,
+                'postedAt': now,
+            })
+        
+        logger.info(f"Lever API found {len(jobs)} jobs for {company_name}")
+        return jobs
+        
+    except Exception as e:
+        logger.error(f"Lever API scrape failed for {company_name}: {e}")
+        return jobs
+
 def get_scraper(url):
     """Determine which scraper to use based on URL"""
     url_lower = url.lower()
     
     if 'greenhouse.io' in url_lower or 'greenhouse' in url_lower:
-        return scrape_greenhouse
+        return scrape_greenhouse_api if greenhouse_board_token(url) else scrape_greenhouse
     elif 'lever.co' in url_lower or 'lever' in url_lower:
-        return scrape_lever
+        return scrape_lever_api if lever_company_slug(url) else scrape_lever
     elif 'workable.com' in url_lower or 'apply.workable' in url_lower:
         return scrape_workable
     else:
         return None
 
-def store_jobs(jobs):
-    """Store jobs in Firestore, avoiding duplicates"""
-    batch = db.batch()
+def store_jobs(jobs, writer):
+    """Queue job writes on a shared BulkWriter, avoiding duplicates"""
+    jobs_collection = db.collection('jobs')
+    job_refs = [jobs_collection.document(job['jobId']) for job in jobs]
+    
+    # Check existence of all jobs with batched multi-gets instead of one get() per job
+    existing_paths = set()
+    for i in range(0, len(job_refs), GET_ALL_CHUNK_SIZE):
+        for snapshot in db.get_all(job_refs[i:i + GET_ALL_CHUNK_SIZE]):
+            if snapshot.exists:
+                existing_paths.add(snapshot.reference.path)
+    
     new_jobs = []
     
-    for job in jobs:
-        job_ref = db.collection('jobs').document(job['jobId'])
-        
-        # Check if job already exists
-        job_doc = job_ref.get()
-        
-        if not job_doc.exists:
-            # New job — set postedAt for the first time
-            job_data = {**job, 'postedAt': firestore.SERVER_TIMESTAMP}
-            batch.set(job_ref, job_data)
-            new_jobs.append(job)
-        else:
-            # Existing job — only update scrape metadata, never reset postedAt
-            batch.update(job_ref, {
-                'scrapedAt': firestore.SERVER_TIMESTAMP,
-                'status': 'active'
-            })
+    # BulkWriter isn't thread-safe and companies are stored from worker threads
+    with writer_lock:
+        for job, job_ref in zip(jobs, job_refs):
+            if job_ref.path not in existing_paths:
+                # New job — postedAt is the scrape time on first sight
+                writer.set(job_ref, job)
+                new_jobs.append(job)
+            else:
+                # Existing job — only update scrape metadata, never reset postedAt
+                writer.update(job_ref, {
+                    'scrapedAt': job['scrapedAt'],
+                    'status': 'active'
+                })
     
-    batch.commit()
-    logger.info(f"Stored {len(new_jobs)} new jobs, updated {len(jobs) - len(new_jobs)} existing jobs")
+    logger.info(f"Queued {len(new_jobs)} new jobs, {len(jobs) - len(new_jobs)} existing job updates")
     
     return new_jobs
 
-def scrape_company(company_data):
-    """Scrape a single company"""
+async def scrape_company(client, company_data, semaphore, writer):
+    """Scrape a single company; returns (new_jobs, company_stats_update)"""
     company_id = company_data['companyId']
     company_name = company_data['name']
     careers_url = company_data['careersUrl']
     
-    logger.info(f"Scraping {company_name}...")
-    
     scraper = get_scraper(careers_url)
     
     if not scraper:
         logger.warning(f"No scraper found for {company_name} URL: {careers_url}")
-        return []
+        return [], None
     
-    jobs = scraper(careers_url, company_name, company_id)
+    async with semaphore:
+        logger.info(f"Scraping {company_name}...")
+        jobs = await scraper(client, careers_url, company_name, company_id)
     
     if jobs:
-        new_jobs = store_jobs(jobs)
+        # Firestore client is synchronous; keep it off the event loop
+        new_jobs = await asyncio.to_thread(store_jobs, jobs, writer)
         
-        # Update company stats
-        db.collection('companies').document(company_id).update({
-            'lastScraped': firestore.SERVER_TIMESTAMP,
+        # Company stats are written by the caller alongside everything else
+        return new_jobs, {
+            'lastScraped': jobs[0]['scrapedAt'],
             'jobCount': len(jobs)
-        })
+        }
+    
+    return [], None
+
+async def scrape_companies(companies, writer):
+    """Scrape companies concurrently over the shared client; returns (new_jobs, stats) per company"""
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_SCRAPES)
+    client = get_http_client()
+    
+    return await asyncio.gather(
+        *[scrape_company(client, company, semaphore, writer) for company in companies],
+        return_exceptions=True
+    )
+
+def scrape_and_store(companies):
+    """Scrape companies and flush every job and company write through one BulkWriter"""
+    writer = db.bulk_writer()
+    try:
+        results = run_async(scrape_companies(companies, writer))
         
-        return new_jobs
+        for company, result in zip(companies, results):
+            if isinstance(result, Exception):
+                continue
+            _, company_update = result
+            if company_update:
+                writer.update(db.collection('companies').document(company['companyId']), company_update)
+    finally:
+        writer.close()
     
-    return []
+    return results
 
 @functions_framework.http
 def scrape_all_companies(request):
@@ -327,23 +543,17 @@ def scrape_all_companies(request):
         
         logger.info(f"Starting scrape for {len(companies)} companies")
         
-        # Scrape companies in parallel (max 10 concurrent)
+        # Scrape companies concurrently (max 10 in flight)
         all_new_jobs = []
+        results = scrape_and_store(companies)
         
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            future_to_company = {
-                executor.submit(scrape_company, company): company 
-                for company in companies
-            }
-            
-            for future in as_completed(future_to_company):
-                company = future_to_company[future]
-                try:
-                    new_jobs = future.result()
-                    all_new_jobs.extend(new_jobs)
-                    logger.info(f"Completed {company['name']}: {len(new_jobs)} new jobs")
-                except Exception as e:
-                    logger.error(f"Error scraping {company['name']}: {e}")
+        for company, result in zip(companies, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error scraping {company['name']}: {result}")
+                continue
+            new_jobs, _ = result
+            all_new_jobs.extend(new_jobs)
+            logger.info(f"Completed {company['name']}: {len(new_jobs)} new jobs")
         
         logger.info(f"Scraping complete! Found {len(all_new_jobs)} new jobs total")
         
@@ -378,7 +588,10 @@ def scrape_single_company(request):
         company_data = company_doc.to_dict()
         company_data['companyId'] = company_id
         
-        new_jobs = scrape_company(company_data)
+        [result] = scrape_and_store([company_data])
+        if isinstance(result, Exception):
+            raise result
+        new_jobs, _ = result
         
         return {
             'success': True,
@@ -391,6 +604,10 @@ def scrape_single_company(request):
         logger.error(f"Single company scraping error: {e}")
         return {'error': str(e)}, 500
 
+async def fetch_page(url):
+    """Fetch a single page over the shared client"""
+    return await safe_request(get_http_client(), url)
+
 @functions_framework.http
 def fetch_job_details(request):
     """Fetch detailed job description from URL"""
@@ -401,38 +618,41 @@ def fetch_job_details(request):
             return {'error': 'url is required'}, 400
         
         url = request_json['url']
-        response = safe_request(url)
+        response = run_async(fetch_page(url))
         
         if not response:
             return {'error': 'Failed to fetch job page'}, 500
         
-        soup = BeautifulSoup(response.text, 'html.parser')
+        tree = LexborHTMLParser(response.content)
         
         # Extract job description
         description = None
         
         # Try common selectors
         desc_selectors = [
-            {'class': 'content'},
-            {'class': 'description'},
-            {'class': 'job-description'},
-            {'id': 'content'},
+            'div.content',
+            'div.description',
+            'div.job-description',
+            'div#content',
         ]
         
         for selector in desc_selectors:
-            desc_elem = soup.find('div', selector)
+            desc_elem = tree.css_first(selector)
             if desc_elem:
-                description = desc_elem.get_text(strip=True, separator='\n')
+                description = node_text(desc_elem, separator='\n')
                 break
         
         # Extract requirements
         requirements = []
-        req_section = soup.find(['h2', 'h3', 'h4'], string=lambda t: t and 'requirement' in t.lower())
+        req_section = next(
+            (h for h in tree.css('h2, h3, h4') if 'requirement' in h.text().lower()),
+            None
+        )
         
         if req_section:
-            req_list = req_section.find_next(['ul', 'ol'])
+            req_list = find_next(req_section, ('ul', 'ol'))
             if req_list:
-                requirements = [li.get_text(strip=True) for li in req_list.find_all('li')]
+                requirements = [node_text(li) for li in req_list.css('li')]
         
         return {
             'success': True,
@@ -11,18 +11,27 @@ FULLY AUTONOMOUS APPLICATION ENGINE
 """
 
 import asyncio
+import aiofiles
 import os
 import httpx
 import base64
+import hashlib
+import orjson
 import logging
+import re
+import sys
 from pathlib import Path
+from urllib.parse import urlsplit
 from typing import Dict, Optional, List
 from datetime import datetime, timezone
 
-from playwright.async_api import async_playwright, Page, TimeoutError as PlaywrightTimeout
+from playwright.async_api import async_playwright, BrowserContext, Locator, Page, TimeoutError as PlaywrightTimeout
 from dotenv import load_dotenv
 import firebase_admin
 from firebase_admin import firestore
+from google.api_core.exceptions import NotFound
+
+from rate_limit import ATS_LIMITER
 
 logger = logging.getLogger(__name__)
 
@@ -33,12 +42,220 @@ load_dotenv(dotenv_path=env_path)
 DEEPSEEK_API_KEY = os.getenv('DEEPSEEK_API_KEY')
 DEEPSEEK_API_URL = 'https://api.deepseek.com/v1/chat/completions'
 
-if not firebase_admin._apps:
-    from firebase_admin import credentials
-    cred = credentials.Certificate('serviceAccountKey.json')
-    firebase_admin.initialize_app(cred)
+# Phone digits, and characters stripped from resume filenames (\w rather than
+# A-Za-z0-9 so non-ASCII names survive, as with str.isalnum)
+_NON_DIGIT = re.compile(r'\D')
+_SAFE_NAME = re.compile(r'[^\w-]')
+
+# Confirmation phrases, matched case-insensitively in one pass over the HTML
+_SUCCESS_RE = re.compile(
+    r'application submitted|thank you for applying|application received'
+    r'|successfully submitted|your application has been sent',
+    re.IGNORECASE
+)
+_LINKEDIN_SUCCESS_RE = re.compile(
+    r'application sent|application submitted|your application was sent',
+    re.IGNORECASE
+)
+
+# Browser contexts kept open for reuse; bounds concurrent applications
+MAX_CONTEXTS = 4
+
+# DeepSeek calls in flight at once, and the retry schedule applied to
+# rate-limited (429), 5xx and timed-out requests
+DEEPSEEK_MAX_CONCURRENT = 10
+DEEPSEEK_MAX_ATTEMPTS = 5
+DEEPSEEK_BACKOFF_INITIAL = 1.0
+DEEPSEEK_BACKOFF_FACTOR = 2.0
+
+# Bytes per write when streaming a resume download to disk
+RESUME_CHUNK_SIZE = 64 * 1024
+
+# Successful form analyses, one JSON file per sha256(host + DOM digest)
+FORM_ANALYSIS_CACHE_DIR = Path("form_analysis_cache")
+
+# Profile fields the AI form analysis may map a control onto
+AI_PROFILE_KEYS = ('firstName', 'lastName', 'email', 'phone', 'location', 'linkedinUrl')
+
+# Requests aborted on every context: heavy resources a form-fill never needs,
+# and trackers/widgets. Stylesheets stay because visibility checks need them.
+BLOCKED_RESOURCE_TYPES = frozenset({'image', 'media', 'font'})
+BLOCKED_URL_PARTS = ('googletagmanager', 'google-analytics', 'doubleclick', 'segment.io', 'hotjar', 'facebook.net')
+
+# Seconds between background writes of buffered progress updates
+PROGRESS_FLUSH_INTERVAL = 0.3
+
+# Updates per Firestore WriteBatch commit (Firestore caps a batch at 500)
+WRITE_BATCH_SIZE = 400
+
+# LinkedIn Easy Apply modal buttons
+LINKEDIN_NEXT_SELECTOR = 'button:has-text("Next"), button[aria-label="Continue to next step"]'
+LINKEDIN_REVIEW_SELECTOR = 'button:has-text("Review")'
+LINKEDIN_SUBMIT_SELECTOR = 'button:has-text("Submit application"), button[aria-label="Submit application"]'
+LINKEDIN_ACTION_SELECTOR = f'{LINKEDIN_SUBMIT_SELECTOR}, {LINKEDIN_REVIEW_SELECTOR}, {LINKEDIN_NEXT_SELECTOR}'
+
+# JPEG quality for confirmation screenshots; several times smaller than PNG,
+# keeping results well under Firestore's 1 MiB document limit
+SCREENSHOT_QUALITY = 70
+
+# Any of these being visible means the page is ready to interact with
+PAGE_READY_SELECTOR = (
+    'input:not([type="hidden"]):visible, button[type="submit"]:visible, '
+    'button:has-text("Easy Apply"):visible'
+)
+
+# Label → profile field rules, checked in priority order. Each rule is
+# (substrings, exact labels, key); the first rule that matches wins.
+TEXT_FIELD_RULES = (
+    (('first name',), ('first',), 'firstName'),
+    (('last name',), ('last',), 'lastName'),
+    (('email',), (), 'email'),
+    (('phone', 'mobile'), (), 'phone'),
+    (('city', 'location'), (), 'location'),
+    (('linkedin', 'profile'), (), 'linkedinUrl'),
+)
+SELECT_FIELD_RULES = (
+    (('experience', 'years'), (), 'experience'),
+    (('authorized', 'work in'), (), 'authorized'),
+    (('sponsorship',), (), 'sponsorship'),
+)
+
+
+def _match_label(label: str, rules) -> Optional[str]:
+    """Key of the first rule whose substrings or exact labels match `label`"""
+    for substrings, exact, key in rules:
+        if label in exact or any(sub in label for sub in substrings):
+            return key
+    return None
+
+
+# Collects every visible input/select/textarea with its label in a single
+# page.evaluate, tagging each with data-ja-k so it can be located afterwards
+_SCAN_FORM_JS = """
+() => {
+    document.querySelectorAll('[data-ja-k]').forEach(e => e.removeAttribute('data-ja-k'));
+    const visible = e => {
+        if (!(e.offsetWidth || e.offsetHeight || e.getClientRects().length)) return false;
+        return getComputedStyle(e).visibility !== 'hidden';
+    };
+    const controls = document.querySelectorAll('input:not([type=hidden]), select, textarea');
+    return Array.from(controls).filter(visible).map((e, k) => {
+        e.setAttribute('data-ja-k', k);
+        const label = (e.labels && e.labels[0] && e.labels[0].innerText)
+            || (e.closest('div, label') || {}).innerText || '';
+        return {
+            k,
+            tag: e.tagName.toLowerCase(),
+            type: (e.type || '').toLowerCase(),
+            id: e.id || '',
+            name: e.name || '',
+            placeholder: e.placeholder || '',
+            label: label.slice(0, 200),
+            options: e.tagName === 'SELECT'
+                ? Array.from(e.options).map(o => ({value: o.value, text: o.text}))
+                : [],
+        };
+    });
+}
+"""
+
+# id/name of every file input, in document order, in a single page.evaluate
+_FILE_INPUTS_JS = """
+() => Array.from(document.querySelectorAll('input[type="file"]'))
+    .map(e => ({id: e.id || '', name: e.name || ''}))
+"""
+
+# Canonical Greenhouse field selectors, keyed by profile field
+_GREENHOUSE_FIELDS = {
+    'firstName': '#first_name',
+    'lastName': '#last_name',
+    'email': '#email',
+    'phone': '#phone',
+}
+
+# Fills {selector: value} in one page.evaluate and returns the selectors it
+# found. Uses the native value setter so framework-controlled inputs see it.
+_FILL_BY_SELECTOR_JS = """
+(values) => {
+    const setValue = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
+    const filled = [];
+    for (const [selector, value] of Object.entries(values)) {
+        const e = document.querySelector(selector);
+        if (!e) continue;
+        setValue.call(e, value);
+        e.dispatchEvent(new Event('input', {bubbles: true}));
+        e.dispatchEvent(new Event('change', {bubbles: true}));
+        filled.push(selector);
+    }
+    return filled;
+}
+"""
+
+# Submit button probes in priority order: (css selector, required text or None)
+SUBMIT_BUTTON_PROBES = [
+    ['button[type="submit"]', None],
+    ['input[type="submit"]', None],
+    ['button', 'submit'],
+    ['button', 'apply'],
+    ['button#submit_app', None],
+]
+
+# Tags the first visible element matching the highest-priority probe with
+# data-ja-submit and returns that probe's index (-1 if none match)
+_FIND_SUBMIT_JS = """
+(probes) => {
+    document.querySelectorAll('[data-ja-submit]').forEach(e => e.removeAttribute('data-ja-submit'));
+    for (let i = 0; i < probes.length; i++) {
+        const [selector, text] = probes[i];
+        for (const e of document.querySelectorAll(selector)) {
+            if (!(e.offsetWidth || e.offsetHeight || e.getClientRects().length)) continue;
+            if (text && !(e.innerText || '').toLowerCase().includes(text)) continue;
+            e.setAttribute('data-ja-submit', '');
+            return i;
+        }
+    }
+    return -1;
+}
+"""
 
-db = firestore.client()
+_db = None
+
+
+def _get_db():
+    """Firestore client, initializing Firebase on first use rather than at import"""
+    global _db
+    if _db is None:
+        if not firebase_admin._apps:
+            from firebase_admin import credentials
+            cred = credentials.Certificate('serviceAccountKey.json')
+            firebase_admin.initialize_app(cred)
+        _db = firestore.client()
+    return _db
+
+
+def _commit_application_updates(updates: Dict[str, Dict]):
+    """
+    Apply {app_id: update} to the applications collection in WriteBatch commits.
+    A batch is atomic, so one application deleted mid-run fails its whole chunk
+    with NotFound; that chunk is then retried doc by doc and the missing ones are
+    dropped. Never upsert: a set() would resurrect the deleted doc as a partial one.
+    """
+    db = _get_db()
+    apps_ref = db.collection('applications')
+    items = list(updates.items())
+    for start in range(0, len(items), WRITE_BATCH_SIZE):
+        chunk = items[start:start + WRITE_BATCH_SIZE]
+        batch = db.batch()
+        for app_id, update in chunk:
+            batch.update(apps_ref.document(app_id), update)
+        try:
+            batch.commit()
+        except NotFound:
+            for app_id, update in chunk:
+                try:
+                    apps_ref.document(app_id).update(update)
+                except NotFound:
+                    logger.info(f"Application {app_id} was deleted, dropping its update")
 
 
 class AutonomousApplier:
@@ -48,15 +265,35 @@ class AutonomousApplier:
     """
     
     def __init__(self):
+        self._playwright = None
         self.browser = None
-        self.context = None
+        self._contexts: List[BrowserContext] = []
+        self._context_pool: Optional[asyncio.Queue] = None
+        self._http: Optional[httpx.AsyncClient] = None
+        self._resume_cache: Dict[str, str] = {}  # sha256(url) → local path
+        self._resume_locks: Dict[str, asyncio.Lock] = {}
+        self._progress_buf: Dict[str, Dict] = {}  # app_id → latest progress update
+        self._progress_lock = asyncio.Lock()
+        self._progress_task: Optional[asyncio.Task] = None
+        self._deepseek_sem = asyncio.Semaphore(DEEPSEEK_MAX_CONCURRENT)
         self.linkedin_session = None
     
-    async def initialize(self, headless: bool = True):
-        """Initialize browser"""
-        playwright = await async_playwright().start()
+    async def initialize(self, headless: bool = True, max_contexts: int = MAX_CONTEXTS):
+        """Initialize browser and a pool of reusable contexts (one per in-flight application)"""
+        if self.browser:
+            return
+        
+        # One pooled HTTP/2 client for every download in this applier's lifetime
+        self._http = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(60.0),
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+            follow_redirects=True
+        )
+        
+        self._playwright = await async_playwright().start()
         
-        self.browser = await playwright.chromium.launch(
+        self.browser = await self._playwright.chromium.launch(
             headless=headless,
             args=[
                 '--disable-blink-features=AutomationControlled',
@@ -65,17 +302,54 @@ class AutonomousApplier:
             ]
         )
         
-        self.context = await self.browser.new_context(
-            viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/120.0.0.0 Safari/537.36'
-        )
+        self._context_pool = asyncio.Queue()
+        for _ in range(max_contexts):
+            context = await self.browser.new_context(
+                viewport={'width': 1920, 'height': 1080},
+                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/120.0.0.0 Safari/537.36'
+            )
+            await context.route('**/*', self._block_heavy_requests)
+            self._contexts.append(context)
+            self._context_pool.put_nowait(context)
         
-        logger.info("✅ Autonomous applier initialized")
+        self._progress_task = asyncio.create_task(self._progress_flusher())
+        
+        logger.info(f"✅ Autonomous applier initialized ({max_contexts} browser contexts)")
+    
+    async def _block_heavy_requests(self, route):
+        """Context route handler: abort blocked resources, continue the rest"""
+        request = route.request
+        if request.resource_type in BLOCKED_RESOURCE_TYPES or any(part in request.url for part in BLOCKED_URL_PARTS):
+            await route.abort()
+        else:
+            await route.continue_()
     
     async def close(self):
-        """Close browser"""
+        """Flush pending progress, then close contexts, browser and Playwright"""
+        if self._progress_task:
+            self._progress_task.cancel()
+            self._progress_task = None
+        await self._flush_progress()
+        
+        for context in self._contexts:
+            try:
+                await context.close()
+            except Exception:
+                pass
+        self._contexts = []
+        self._context_pool = None
+        
         if self.browser:
             await self.browser.close()
+            self.browser = None
+        
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+        
+        if self._http:
+            await self._http.aclose()
+            self._http = None
     
     async def apply_autonomous(
         self, 
@@ -91,18 +365,20 @@ class AutonomousApplier:
                 'success': bool,
                 'method': str,  # 'linkedin_easy', 'ats_form', 'custom'
                 'confirmation_code': str,
-                'screenshot': str (base64),
+                'screenshot': str (base64 JPEG),
                 'error': str (if failed)
             }
         """
-        page = await self.context.new_page()
+        context = await self._context_pool.get()
+        page = None
         
         try:
+            page = await context.new_page()
             await self._update_progress(app_id, 'processing', 30, 'Opening application...')
             
             # Navigate to job
             await page.goto(job_url, wait_until='domcontentloaded', timeout=60000)
-            await page.wait_for_timeout(3000)
+            await self._settle(page, ready=page.locator(PAGE_READY_SELECTOR))
             
             # Detect application type
             app_type = await self._detect_application_type(page)
@@ -137,7 +413,38 @@ class AutonomousApplier:
             }
         
         finally:
-            await page.close()
+            try:
+                # Land buffered progress before the caller writes the final status
+                await self._flush_progress()
+                if page is not None:
+                    await page.close()
+                # Isolate sessions between jobs before handing the context back
+                try:
+                    await context.clear_cookies()
+                except Exception:
+                    pass
+            finally:
+                # Always return the context, or the pool shrinks for good
+                self._context_pool.put_nowait(context)
+    
+    async def apply_many(self, specs: List[Dict], max_concurrent: Optional[int] = None) -> List:
+        """
+        Apply to several jobs concurrently.
+        
+        Each spec holds apply_autonomous kwargs (job_url, user_profile, app_id).
+        Concurrency defaults to the context pool size, and each start takes an
+        ATS_LIMITER token. Results come back in
+        spec order; a spec that raised yields its exception instead of a dict.
+        """
+        semaphore = asyncio.Semaphore(max_concurrent or len(self._contexts) or 1)
+        
+        async def _apply_one(spec: Dict) -> Dict:
+            async with semaphore:
+                # Pace application starts toward target ATS sites
+                await ATS_LIMITER.acquire()
+                return await self.apply_autonomous(**spec)
+        
+        return await asyncio.gather(*[_apply_one(spec) for spec in specs], return_exceptions=True)
     
     async def _detect_application_type(self, page: Page) -> str:
         """Detect which ATS or platform is being used"""
@@ -191,7 +498,7 @@ class AutonomousApplier:
             # Click "Easy Apply" button
             easy_apply_btn = page.locator('button:has-text("Easy Apply")').first
             await easy_apply_btn.click()
-            await page.wait_for_timeout(2000)
+            await self._settle(page, page.locator(LINKEDIN_ACTION_SELECTOR))
             
             step = 1
             max_steps = 10  # Prevent infinite loops
@@ -209,25 +516,25 @@ class AutonomousApplier:
                 # Fill current page
                 await self._fill_linkedin_modal_page(page, profile)
                 
-                # Wait for page to process
-                await page.wait_for_timeout(1500)
+                # Check for buttons: one round-trip reads every action button's text
+                next_btn = page.locator(LINKEDIN_NEXT_SELECTOR)
+                review_btn = page.locator(LINKEDIN_REVIEW_SELECTOR)
+                submit_btn = page.locator(LINKEDIN_SUBMIT_SELECTOR)
                 
-                # Check for buttons
-                next_btn = page.locator('button:has-text("Next"), button[aria-label="Continue to next step"]')
-                review_btn = page.locator('button:has-text("Review")')
-                submit_btn = page.locator('button:has-text("Submit application"), button[aria-label="Submit application"]')
+                labels = ' | '.join(await submit_btn.or_(review_btn).or_(next_btn).evaluate_all(
+                    "els => els.map(e => `${e.innerText} ${e.getAttribute('aria-label') || ''}`.toLowerCase())"
+                ))
                 
                 # Priority: Submit > Review > Next
-                if await submit_btn.count() > 0:
+                if 'submit' in labels:
                     logger.info("  ✅ Submitting application...")
                     await submit_btn.first.click()
-                    await page.wait_for_timeout(3000)
                     
-                    # Verify submission
+                    # Verify submission (waits for the confirmation itself)
                     success = await self._verify_linkedin_success(page)
                     
                     if success:
-                        screenshot = await page.screenshot()
+                        screenshot = await self._confirmation_screenshot(page)
                         
                         await self._update_progress(app_id, 'applied', 100, 'Success!')
                         
@@ -235,19 +542,19 @@ class AutonomousApplier:
                             'success': True,
                             'method': 'linkedin_easy',
                             'confirmation_code': 'LinkedIn Application Submitted',
-                            'screenshot': base64.b64encode(screenshot).decode()
+                            'screenshot': screenshot
                         }
                     else:
                         return {'success': False, 'error': 'No confirmation detected'}
                 
-                elif await review_btn.count() > 0:
+                elif 'review' in labels:
                     await review_btn.first.click()
-                    await page.wait_for_timeout(1500)
+                    await self._settle(page, page.locator(LINKEDIN_ACTION_SELECTOR))
                     step += 1
                 
-                elif await next_btn.count() > 0:
+                elif 'next' in labels or 'continue' in labels:
                     await next_btn.first.click()
-                    await page.wait_for_timeout(1500)
+                    await self._settle(page, page.locator(LINKEDIN_ACTION_SELECTOR))
                     step += 1
                 
                 else:
@@ -260,70 +567,73 @@ class AutonomousApplier:
             logger.error(f"❌ LinkedIn Easy Apply error: {e}")
             return {'success': False, 'error': str(e)}
     
+    async def _scan_form(self, page: Page) -> List[Dict]:
+        """
+        Describe every visible form control in one round-trip.
+        
+        Each control is tagged with a data-ja-k attribute so it can be
+        addressed later via _field_locator.
+        """
+        return await page.evaluate(_SCAN_FORM_JS)
+    
+    def _field_locator(self, page: Page, field: Dict):
+        """Locator for a control returned by _scan_form"""
+        return page.locator(f'[data-ja-k="{field["k"]}"]')
+    
     async def _fill_linkedin_modal_page(self, page: Page, profile: Dict):
         """Fill fields on current LinkedIn modal page"""
         try:
-            # Text inputs
-            text_inputs = await page.locator('input[type="text"]:visible, input[type="email"]:visible').all()
+            fields = await self._scan_form(page)
             
-            for input_field in text_inputs:
+            # Text inputs
+            for field in fields:
+                if field['tag'] != 'input' or field['type'] not in ('text', 'email'):
+                    continue
                 try:
-                    label_text = await self._get_field_label(page, input_field)
-                    if not label_text:
+                    label_lower = field['label'].strip().lower()
+                    if not label_lower:
                         continue
                     
-                    label_lower = label_text.lower()
-                    
                     # Determine value based on label
-                    value = None
-                    
-                    if 'first name' in label_lower or label_lower == 'first':
-                        value = profile.get('firstName', '')
-                    elif 'last name' in label_lower or label_lower == 'last':
-                        value = profile.get('lastName', '')
-                    elif 'email' in label_lower:
-                        value = profile.get('email', '')
-                    elif 'phone' in label_lower or 'mobile' in label_lower:
-                        value = self._format_phone(profile.get('phone', ''))
-                    elif 'city' in label_lower or 'location' in label_lower:
-                        value = profile.get('location', '')
-                    elif 'linkedin' in label_lower or 'profile' in label_lower:
-                        value = profile.get('linkedinUrl', '')
+                    key = _match_label(label_lower, TEXT_FIELD_RULES)
+                    value = profile.get(key, '') if key else None
+                    if key == 'phone':
+                        value = self._format_phone(value)
                     
                     if value:
-                        await input_field.fill(value)
-                        await page.wait_for_timeout(300)
+                        await self._field_locator(page, field).fill(value)
                 
                 except:
                     continue
             
             # Dropdowns/Selects
-            selects = await page.locator('select:visible').all()
-            
-            for select in selects:
+            for field in fields:
+                if field['tag'] != 'select':
+                    continue
                 try:
-                    label_text = await self._get_field_label(page, select)
-                    if not label_text:
+                    label_lower = field['label'].strip().lower()
+                    if not label_lower:
                         continue
                     
-                    label_lower = label_text.lower()
+                    select = self._field_locator(page, field)
                     
                     # Handle common dropdowns
-                    if 'experience' in label_lower or 'years' in label_lower:
+                    kind = _match_label(label_lower, SELECT_FIELD_RULES)
+                    
+                    if kind == 'experience':
                         years = profile.get('yearsOfExperience', 10)
                         # Select closest option
-                        options = await select.locator('option').all()
-                        for option in options:
-                            text = await option.inner_text()
+                        for option in field['options']:
+                            text = option['text']
                             if str(years) in text or f'{years}+' in text:
-                                await select.select_option(value=await option.get_attribute('value'))
+                                await select.select_option(value=option['value'])
                                 break
                     
-                    elif 'authorized' in label_lower or 'work in' in label_lower:
+                    elif kind == 'authorized':
                         eligible = profile.get('eligibleToWorkInUS', True)
                         await select.select_option(label='Yes' if eligible else 'No')
                     
-                    elif 'sponsorship' in label_lower:
+                    elif kind == 'sponsorship':
                         requires = profile.get('requiresSponsorship', False)
                         await select.select_option(label='No' if not requires else 'Yes')
                     
@@ -331,19 +641,16 @@ class AutonomousApplier:
                     continue
             
             # File uploads (resume)
-            file_inputs = await page.locator('input[type="file"]:visible').all()
+            file_inputs = [field for field in fields if field['tag'] == 'input' and field['type'] == 'file']
             
             resume_url = profile.get('resumeUrl')
             if resume_url and file_inputs:
-                resume_path = await self._download_resume(
-                    resume_url, 
-                    f"{profile.get('firstName', 'Resume')}_{profile.get('lastName', '')}"
-                )
+                resume_path = await self._download_resume(resume_url, self._resume_prefix(profile))
                 
-                if resume_path and len(file_inputs) > 0:
+                if resume_path:
                     try:
-                        await file_inputs[0].set_input_files(resume_path)
-                        await page.wait_for_timeout(2000)
+                        await self._field_locator(page, file_inputs[0]).set_input_files(resume_path)
+                        await self._wait_for_upload(page, resume_path)
                         logger.info("  ✅ Resume uploaded")
                     except:
                         pass
@@ -354,10 +661,7 @@ class AutonomousApplier:
     async def _verify_linkedin_success(self, page: Page) -> bool:
         """Verify LinkedIn application was submitted"""
         try:
-            # Wait for confirmation message
-            await page.wait_for_timeout(2000)
-            
-            # Check for success indicators
+            # Check for success indicators, waiting for the first one to appear
             success_selectors = [
                 'text="Application sent"',
                 'text="Your application was sent"',
@@ -366,19 +670,19 @@ class AutonomousApplier:
                 '.artdeco-inline-feedback--success'
             ]
             
-            for selector in success_selectors:
-                if await page.locator(selector).count() > 0:
-                    logger.info("✅ LinkedIn confirmation detected")
-                    return True
+            confirmation = page.locator(success_selectors[0])
+            for selector in success_selectors[1:]:
+                confirmation = confirmation.or_(page.locator(selector))
             
-            # Check page content
-            content = await page.content()
-            if any(phrase in content.lower() for phrase in [
-                'application sent', 'application submitted', 'your application was sent'
-            ]):
+            try:
+                await confirmation.first.wait_for(state='attached', timeout=6000)
+                logger.info("✅ LinkedIn confirmation detected")
                 return True
+            except PlaywrightTimeout:
+                pass
             
-            return False
+            # Check page content
+            return _LINKEDIN_SUCCESS_RE.search(await page.content()) is not None
             
         except:
             return False
@@ -399,12 +703,20 @@ class AutonomousApplier:
             
             await self._update_progress(app_id, 'processing', 50, 'Filling Greenhouse form')
             
-            # Fill basic fields
-            await self._fill_basic_form(page, profile)
-            
-            # Upload resume
+            # Download the resume while the form is filled
             resume_url = profile.get('resumeUrl')
+            resume_task = None
             if resume_url:
+                resume_task = asyncio.create_task(
+                    self._download_resume(resume_url, self._resume_prefix(profile))
+                )
+            
+            # Fill basic fields
+            await self._fill_greenhouse_fields(page, profile)
+            
+            # Upload resume (served from the download cache once the task finishes)
+            if resume_task:
+                await resume_task
                 await self._upload_resume_to_form(page, resume_url, profile)
             
             # Handle custom questions with DeepSeek
@@ -414,18 +726,18 @@ class AutonomousApplier:
             submit_btn = await self._find_submit_button(page)
             if submit_btn:
                 await submit_btn.click()
-                await page.wait_for_timeout(3000)
+                await self._settle(page, load_state='networkidle')
                 
                 success = await self._verify_generic_success(page)
                 
                 if success:
-                    screenshot = await page.screenshot()
+                    screenshot = await self._confirmation_screenshot(page)
                     await self._update_progress(app_id, 'applied', 100, 'Success!')
                     
                     return {
                         'success': True,
                         'method': 'greenhouse',
-                        'screenshot': base64.b64encode(screenshot).decode()
+                        'screenshot': screenshot
                     }
             
             return {'success': False, 'error': 'Could not submit'}
@@ -433,6 +745,20 @@ class AutonomousApplier:
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
+    async def _fill_greenhouse_fields(self, page: Page, profile: Dict):
+        """Fill the canonical Greenhouse fields in one round-trip"""
+        values = {}
+        for key, selector in _GREENHOUSE_FIELDS.items():
+            value = self._format_phone(profile.get(key, '')) if key == 'phone' else profile.get(key, '')
+            if value:
+                values[selector] = value
+        
+        filled = await page.evaluate(_FILL_BY_SELECTOR_JS, values)
+        
+        # Layout without the canonical ids: fall back to selector probing
+        if len(filled) < len(values):
+            await self._fill_basic_form(page, profile)
+    
     # =========================================================================
     # AI Vision-Driven Application (Fallback)
     # =========================================================================
@@ -451,12 +777,8 @@ class AutonomousApplier:
             
             await self._update_progress(app_id, 'processing', 60, 'AI analyzing form')
             
-            # Take screenshot
-            screenshot = await page.screenshot()
-            screenshot_b64 = base64.b64encode(screenshot).decode()
-            
             # Ask DeepSeek to analyze the form
-            form_analysis = await self._analyze_form_with_deepseek(screenshot_b64, page.url)
+            form_analysis = await self._analyze_form_with_deepseek(page, page.url)
             
             if not form_analysis:
                 return {'success': False, 'error': 'AI could not analyze form'}
@@ -473,22 +795,22 @@ class AutonomousApplier:
                     await self._upload_resume_to_form(page, resume_url, profile)
             
             # Submit
-            submit_selector = form_analysis.get('submit_button')
-            if submit_selector:
+            submit_btn = await self._find_submit_button(page)
+            if submit_btn:
                 try:
-                    await page.locator(submit_selector).click()
-                    await page.wait_for_timeout(3000)
+                    await submit_btn.click()
+                    await self._settle(page, load_state='networkidle')
                     
                     success = await self._verify_generic_success(page)
                     
                     if success:
-                        final_screenshot = await page.screenshot()
+                        final_screenshot = await self._confirmation_screenshot(page)
                         await self._update_progress(app_id, 'applied', 100, 'Success!')
                         
                         return {
                             'success': True,
                             'method': 'ai_vision',
-                            'screenshot': base64.b64encode(final_screenshot).decode()
+                            'screenshot': final_screenshot
                         }
                 except:
                     pass
@@ -499,13 +821,120 @@ class AutonomousApplier:
             logger.error(f"AI vision application error: {e}")
             return {'success': False, 'error': str(e)}
     
-    async def _analyze_form_with_deepseek(self, screenshot_b64: str, url: str) -> Optional[Dict]:
+    async def _analyze_form_with_deepseek(self, page: Page, url: str) -> Optional[Dict]:
         """
-        AI vision form analysis.
-        DeepSeek does not support vision. Requires GPT-4V or Claude Opus for real implementation.
-        Returns None so caller aborts rather than submitting an empty form.
+        AI form analysis.
+        DeepSeek does not support vision, so the form is described from the
+        _scan_form DOM scan instead of a screenshot.
+        
+        Returns:
+            {'fields': [{'k': int, 'profile_key': str}], 'needs_resume': bool},
+            or None so the caller aborts rather than submitting an empty form
         """
-        logger.warning(f"AI vision fallback triggered for {url} — not implemented. Aborting.")
+        fields = await self._scan_form(page)
+        if not fields:
+            logger.warning(f"No form fields found on {url}")
+            return None
+        
+        controls = [
+            {
+                'k': f['k'],
+                'tag': f['tag'],
+                'type': f['type'],
+                'label': f['label'][:100],
+                'name': f['name'],
+                'placeholder': f['placeholder'],
+            }
+            for f in fields
+        ]
+        
+        # Jobs at one company share an ATS template, so key on the host plus
+        # the ordered controls (the order fixes which k each mapping targets)
+        dom_digest = orjson.dumps([[f['tag'], f['type'], f['name'], f['id'], f['label']] for f in controls])
+        key = hashlib.sha256(urlsplit(url).netloc.encode() + dom_digest).hexdigest()
+        cache_path = FORM_ANALYSIS_CACHE_DIR / f"{key}.json"
+        
+        try:
+            cached = await asyncio.to_thread(cache_path.read_bytes)
+            logger.info("  💾 Cached form analysis")
+            return orjson.loads(cached)
+        except (OSError, ValueError):
+            pass
+        
+        prompt = f"""You are analyzing a job application form at {url}.
+
+FORM CONTROLS (JSON):
+{orjson.dumps(controls).decode()}
+
+Map each control that asks for one of these candidate profile fields: {', '.join(AI_PROFILE_KEYS)}.
+Respond with JSON only, in this shape:
+{{"fields": [{{"k": <control k>, "profile_key": "<profile field>"}}], "needs_resume": <true if a control asks for a resume/CV upload>}}"""
+        
+        content = await self._deepseek_chat(
+            [{'role': 'user', 'content': prompt}],
+            temperature=0.0,
+            max_tokens=1000,
+            response_format={'type': 'json_object'},
+        )
+        if not content:
+            return None
+        
+        try:
+            analysis = orjson.loads(content)
+        except ValueError:
+            logger.error(f"DeepSeek returned invalid JSON for {url}")
+            return None
+        
+        analysis['fields'] = [
+            f for f in analysis.get('fields', [])
+            if isinstance(f, dict) and f.get('profile_key') in AI_PROFILE_KEYS
+        ]
+        
+        try:
+            await asyncio.to_thread(FORM_ANALYSIS_CACHE_DIR.mkdir, exist_ok=True)
+            await asyncio.to_thread(cache_path.write_bytes, orjson.dumps(analysis))
+        except OSError as e:
+            logger.debug(f"Form analysis cache write error: {e}")
+        
+        return analysis
+    
+    async def _deepseek_chat(self, messages: List[Dict], **params) -> Optional[str]:
+        """
+        POST a chat completion through the shared client.
+        
+        At most DEEPSEEK_MAX_CONCURRENT requests run at once so a batch from
+        apply_many is throttled here instead of by 429s; rate limits, 5xx and
+        timeouts are retried with exponential backoff.
+        """
+        if not DEEPSEEK_API_KEY:
+            logger.error("❌ DeepSeek API Key is missing! Check .env.local")
+            return None
+        
+        payload = orjson.dumps({'model': 'deepseek-chat', 'messages': messages, **params})
+        headers = {'Authorization': f'Bearer {DEEPSEEK_API_KEY}', 'Content-Type': 'application/json'}
+        delay = DEEPSEEK_BACKOFF_INITIAL
+        
+        async with self._deepseek_sem:
+            for attempt in range(1, DEEPSEEK_MAX_ATTEMPTS + 1):
+                try:
+                    response = await self._http.post(DEEPSEEK_API_URL, content=payload, headers=headers)
+                    response.raise_for_status()
+                    return orjson.loads(response.content)['choices'][0]['message']['content']
+                except httpx.HTTPStatusError as e:
+                    status = e.response.status_code
+                    if status != 429 and status < 500:
+                        logger.error(f"DeepSeek API error: {status}")
+                        return None
+                    error = f"HTTP {status}"
+                except httpx.TransportError as e:  # includes timeouts
+                    error = type(e).__name__
+                
+                if attempt < DEEPSEEK_MAX_ATTEMPTS:
+                    logger.warning(f"  ⏳ DeepSeek {error}, retrying in {delay:.0f}s ({attempt}/{DEEPSEEK_MAX_ATTEMPTS})...")
+                    await asyncio.sleep(delay)
+                    delay *= DEEPSEEK_BACKOFF_FACTOR
+        
+        logger.error(f"DeepSeek request failed after {DEEPSEEK_MAX_ATTEMPTS} attempts")
         return None
     
     async def _execute_ai_fill_instructions(
@@ -515,8 +944,17 @@ class AutonomousApplier:
         profile: Dict
     ):
         """Execute AI-generated fill instructions"""
-        # This would contain AI-driven field filling
-        # Fallback to basic filling for now
+        for field in instructions.get('fields', []):
+            key = field['profile_key']
+            value = self._format_phone(profile.get(key, '')) if key == 'phone' else profile.get(key, '')
+            if not value:
+                continue
+            try:
+                await self._field_locator(page, field).fill(value)
+            except Exception:
+                pass
+        
+        # Basic filling covers anything the analysis missed
         await self._fill_basic_form(page, profile)
     
     # =========================================================================
@@ -580,28 +1018,23 @@ class AutonomousApplier:
     ):
         """Download and upload resume"""
         try:
-            resume_path = await self._download_resume(
-                resume_url,
-                f"{profile.get('firstName', 'Resume')}_{profile.get('lastName', '')}"
-            )
+            resume_path = await self._download_resume(resume_url, self._resume_prefix(profile))
             
             if not resume_path:
                 return
             
             # Find resume upload field
-            file_inputs = await page.locator('input[type="file"]').all()
+            file_inputs = page.locator('input[type="file"]')
+            metas = await page.evaluate(_FILE_INPUTS_JS)
             
-            for file_input in file_inputs:
+            for i, meta in enumerate(metas):
+                # Check if it's resume field (not cover letter)
+                if 'cover' in meta['id'].lower() or 'cover' in meta['name'].lower():
+                    continue
+                
                 try:
-                    # Check if it's resume field (not cover letter)
-                    input_id = await file_input.get_attribute('id') or ''
-                    input_name = await file_input.get_attribute('name') or ''
-                    
-                    if 'cover' in input_id.lower() or 'cover' in input_name.lower():
-                        continue
-                    
-                    await file_input.set_input_files(resume_path)
-                    await page.wait_for_timeout(2000)
+                    await file_inputs.nth(i).set_input_files(resume_path)
+                    await self._wait_for_upload(page, resume_path)
                     logger.info("  ✅ Resume uploaded")
                     return
                 except:
@@ -610,98 +1043,98 @@ class AutonomousApplier:
         except Exception as e:
             logger.error(f"Resume upload error: {e}")
     
+    def _resume_prefix(self, profile: Dict) -> str:
+        """Filename prefix for the candidate's uploaded resume"""
+        return f"{profile.get('firstName', 'Resume')}_{profile.get('lastName', '')}"
+    
     async def _download_resume(self, url: str, filename_prefix: str) -> Optional[str]:
-        """Download resume from URL"""
-        try:
-            temp_dir = Path("temp_resumes")
-            temp_dir.mkdir(exist_ok=True)
+        """Download resume from URL, reusing an earlier download of the same URL"""
+        key = hashlib.sha256(url.encode()).hexdigest()
+        
+        cached = self._resume_cache.get(key)
+        if cached and os.path.exists(cached):
+            return cached
+        
+        # Concurrent applies for the same user share one download
+        async with self._resume_locks.setdefault(key, asyncio.Lock()):
+            cached = self._resume_cache.get(key)
+            if cached and os.path.exists(cached):
+                return cached
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, timeout=60.0, follow_redirects=True)
+            try:
+                # Keyed directory keeps the human-readable filename for the upload
+                temp_dir = Path("temp_resumes") / key
+                temp_dir.mkdir(parents=True, exist_ok=True)
                 
-                if response.status_code == 200:
+                async with self._http.stream('GET', url) as response:
+                    if response.status_code != 200:
+                        return None
+                    
                     ext = '.pdf' if 'pdf' in url.lower() else '.docx'
-                    safe_name = "".join(c for c in filename_prefix if c.isalnum() or c in "_-")
+                    safe_name = _SAFE_NAME.sub('', filename_prefix)
                     file_path = temp_dir / f"{safe_name}{ext}"
                     
-                    file_path.write_bytes(response.content)
-                    return str(file_path)
+                    # Stream to disk so the event loop never blocks on a full-body write
+                    async with aiofiles.open(file_path, 'wb') as f:
+                        async for chunk in response.aiter_bytes(RESUME_CHUNK_SIZE):
+                            await f.write(chunk)
+                
+                self._resume_cache[key] = str(file_path)
+                return str(file_path)
             
-            return None
-        
-        except Exception as e:
-            logger.error(f"Resume download error: {e}")
-            return None
+            except Exception as e:
+                logger.error(f"Resume download error: {e}")
+                return None
     
     async def _handle_custom_questions_ai(self, page: Page, profile: Dict):
         """Handle custom questions using AI — not yet implemented."""
         logger.warning("Custom question handler not implemented — questions will be skipped.")
     
     async def _find_submit_button(self, page: Page):
-        """Find the submit button"""
-        selectors = [
-            'button[type="submit"]',
-            'input[type="submit"]',
-            'button:has-text("Submit")',
-            'button:has-text("Apply")',
-            'button#submit_app'
-        ]
-        
-        for selector in selectors:
-            btn = page.locator(selector).first
-            if await btn.count() > 0:
-                return btn
-        
-        return None
+        """Find the submit button (highest-priority visible match, in one round-trip)"""
+        index = await page.evaluate(_FIND_SUBMIT_JS, SUBMIT_BUTTON_PROBES)
+        if index < 0:
+            return None
+        return page.locator('[data-ja-submit]').first
     
     async def _verify_generic_success(self, page: Page) -> bool:
         """Verify application submission"""
         try:
-            await page.wait_for_timeout(2000)
-            
-            content = await page.content()
-            content_lower = content.lower()
-            
-            success_phrases = [
-                'application submitted',
-                'thank you for applying',
-                'application received',
-                'successfully submitted',
-                'your application has been sent'
-            ]
-            
-            return any(phrase in content_lower for phrase in success_phrases)
+            return _SUCCESS_RE.search(await page.content()) is not None
         
         except:
             return False
     
-    async def _get_field_label(self, page: Page, field) -> Optional[str]:
-        """Get label text for a form field"""
+    async def _settle(
+        self,
+        page: Page,
+        ready: Optional[Locator] = None,
+        load_state: str = 'domcontentloaded',
+        timeout: int = 8000
+    ):
+        """Wait for a load state and, if given, for `ready` to be visible, instead of a fixed sleep"""
         try:
-            field_id = await field.get_attribute('id')
-            if field_id:
-                label = await page.locator(f'label[for="{field_id}"]').first
-                if await label.count() > 0:
-                    return await label.inner_text()
-            
-            # Try parent
-            parent = await field.evaluate_handle('el => el.closest("div, label")')
-            if parent:
-                text = await parent.inner_text()
-                return text.strip()
-        
-        except:
+            await page.wait_for_load_state(load_state, timeout=5000)
+            if ready is not None:
+                await ready.first.wait_for(state='visible', timeout=timeout)
+        except PlaywrightTimeout:
             pass
-        
-        return None
+    
+    async def _confirmation_screenshot(self, page: Page) -> str:
+        """Viewport screenshot as a base64 JPEG string"""
+        shot = await page.screenshot(type='jpeg', quality=SCREENSHOT_QUALITY)
+        return base64.b64encode(shot).decode('ascii')
+    
+    async def _wait_for_upload(self, page: Page, file_path: str, timeout: int = 5000):
+        """Wait for the uploaded file's name to be shown, instead of a fixed sleep"""
+        await self._settle(page, ready=page.get_by_text(Path(file_path).name), timeout=timeout)
     
     def _format_phone(self, phone: str) -> str:
         """Format phone number"""
         if not phone:
             return ""
         
-        import re
-        digits = re.sub(r'\D', '', phone)
+        digits = _NON_DIGIT.sub('', phone)
         
         if len(digits) == 10:
             return f"({digits[:3]}) {digits[3:6]}-{digits[6:]}"
@@ -717,16 +1150,46 @@ class AutonomousApplier:
         progress: int,
         message: str
     ):
-        """Update application progress in Firebase"""
-        try:
-            db.collection('applications').document(app_id).update({
-                'status': status,
-                'progress': progress,
-                'progressMessage': message,
-                'updatedAt': firestore.SERVER_TIMESTAMP
-            })
-        except:
-            pass
+        """Buffer an application progress update; the flusher writes the latest one per app"""
+        self._progress_buf[app_id] = {
+            'status': status,
+            'progress': progress,
+            'progressMessage': message,
+            'updatedAt': firestore.SERVER_TIMESTAMP
+        }
+    
+    async def finalize_application(self, app_id: str, result):
+        """
+        Record an apply_autonomous result (or the exception it raised).
+        
+        The final status joins the progress buffer, so it is written by the
+        same batched flush as progress updates (at the latest on close()).
+        """
+        update = _final_status_update(result)
+        async with self._progress_lock:
+            self._progress_buf[app_id] = {**self._progress_buf.get(app_id, {}), **update}
+    
+    async def _progress_flusher(self):
+        """Periodically write buffered progress to Firebase"""
+        while True:
+            await asyncio.sleep(PROGRESS_FLUSH_INTERVAL)
+            await self._flush_progress()
+    
+    async def _flush_progress(self):
+        """Write buffered progress updates off the event loop"""
+        # The lock also makes callers wait for a flush already in flight
+        async with self._progress_lock:
+            pending, self._progress_buf = self._progress_buf, {}
+            if not pending:
+                return
+            
+            try:
+                await asyncio.to_thread(_commit_application_updates, pending)
+            except Exception as e:
+                logger.error(f"Error writing progress: {e}")
+                # Re-queue for the next flush; entries buffered since the swap are newer
+                for app_id, update in pending.items():
+                    self._progress_buf[app_id] = {**update, **self._progress_buf.get(app_id, {})}
 
 
 # =========================================================================
@@ -736,14 +1199,25 @@ class AutonomousApplier:
 async def process_autonomous_applications():
     """Main function to process pending auto-apply jobs"""
     applier = AutonomousApplier()
+    db = _get_db()
     
     try:
         await applier.initialize(headless=True)  # Set to False for debugging
         
         # Get pending applications
         apps_ref = db.collection('applications')
-        pending = apps_ref.where('method', '==', 'auto-apply').where('status', '==', 'queued').limit(5).stream()
+        pending_query = apps_ref.where('method', '==', 'auto-apply').where('status', '==', 'queued').limit(5)
+        pending = await asyncio.to_thread(lambda: list(pending_query.stream()))
         
+        # Fetch every applicant's profile in one batched read
+        users_ref = db.collection('users')
+        user_ids = {uid for uid in (app_doc.to_dict().get('userId') for app_doc in pending) if uid}
+        user_docs = await asyncio.to_thread(
+            lambda: list(db.get_all([users_ref.document(uid) for uid in user_ids]))
+        ) if user_ids else []
+        profiles = {user_doc.id: user_doc.to_dict() for user_doc in user_docs if user_doc.exists}
+        
+        specs = []
         for app_doc in pending:
             app_data = app_doc.to_dict()
             app_data['id'] = app_doc.id
@@ -755,42 +1229,123 @@ async def process_autonomous_applications():
             
             # Get user profile
             user_id = app_data.get('userId')
-            user_doc = db.collection('users').document(user_id).get()
+            user_profile = profiles.get(user_id)
             
-            if not user_doc.exists:
+            if user_profile is None:
                 logger.error(f"❌ User not found: {user_id}")
                 continue
             
-            user_profile = user_doc.to_dict()
-            
-            # Apply
-            result = await applier.apply_autonomous(
-                job_url=app_data.get('jobUrl'),
-                user_profile=user_profile,
-                app_id=app_data['id']
-            )
+            specs.append({
+                'job_url': app_data.get('jobUrl'),
+                'user_profile': user_profile,
+                'app_id': app_data['id']
+            })
+        
+        # Apply concurrently, bounded by the browser context pool
+        results = await applier.apply_many(specs)
+        
+        for spec, result in zip(specs, results):
+            await applier.finalize_application(spec['app_id'], result)
+    
+    finally:
+        await applier.close()
+
+
+def _final_status_update(result) -> Dict:
+    """Firestore update recording an apply_autonomous result (or exception)"""
+    if isinstance(result, Exception):
+        result = {'success': False, 'error': str(result)}
+    
+    if result['success']:
+        logger.info(f"✅ Application successful!")
+        return {
+            'status': 'applied',
+            'appliedAt': firestore.SERVER_TIMESTAMP,
+            'confirmationCode': result.get('confirmation_code', ''),
+            'applicationMethod': result.get('method', 'autonomous')
+        }
+    
+    logger.error(f"❌ Application failed: {result.get('error')}")
+    return {
+        'status': 'failed',
+        'errorMessage': result.get('error')
+    }
+
+
+async def watch_autonomous_applications():
+    """
+    Long-running alternative to process_autonomous_applications.
+    
+    A Firestore snapshot listener pushes newly queued applications onto an
+    asyncio.Queue as they arrive, instead of polling a bounded slice per run.
+    Concurrency is bounded by the applier's browser context pool.
+    """
+    applier = AutonomousApplier()
+    db = _get_db()
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    in_flight = set()
+    
+    def on_snapshot(col_snapshot, changes, read_time):
+        # Runs on the listener's thread; hand documents to the event loop
+        for change in changes:
+            if change.type.name == 'ADDED':
+                loop.call_soon_threadsafe(queue.put_nowait, change.document)
+    
+    async def process_one(app_doc):
+        app_id = app_doc.id
+        try:
+            app_data = app_doc.to_dict()
+            user_id = app_data.get('userId')
+            user_doc = await asyncio.to_thread(db.collection('users').document(user_id).get) if user_id else None
             
-            if result['success']:
-                logger.info(f"✅ Application successful!")
-                db.collection('applications').document(app_data['id']).update({
-                    'status': 'applied',
-                    'appliedAt': firestore.SERVER_TIMESTAMP,
-                    'confirmationCode': result.get('confirmation_code', ''),
-                    'applicationMethod': result.get('method', 'autonomous')
-                })
-            else:
-                logger.error(f"❌ Application failed: {result.get('error')}")
-                db.collection('applications').document(app_data['id']).update({
-                    'status': 'failed',
-                    'errorMessage': result.get('error')
-                })
+            if user_doc is None or not user_doc.exists:
+                logger.error(f"❌ User not found: {user_id}")
+                return
             
-            # Wait between applications
-            await asyncio.sleep(10)
+            logger.info(f"📋 Processing: {app_data.get('jobTitle')} @ {app_data.get('company')}")
+            try:
+                result = await applier.apply_autonomous(app_data.get('jobUrl'), user_doc.to_dict(), app_id)
+            except Exception as e:
+                result = e
+            await applier.finalize_application(app_id, result)
+        
+        except Exception as e:
+            logger.error(f"Error processing application {app_id}: {e}")
+        finally:
+            in_flight.discard(app_id)
+    
+    await applier.initialize(headless=True)
+    watcher = (
+        db.collection('applications')
+        .where('method', '==', 'auto-apply')
+        .where('status', '==', 'queued')
+        .on_snapshot(on_snapshot)
+    )
+    logger.info("👀 Watching for queued applications...")
+    
+    tasks = set()
+    try:
+        while True:
+            app_doc = await queue.get()
+            # A doc can be re-added while its application is still running
+            if app_doc.id in in_flight:
+                continue
+            in_flight.add(app_doc.id)
+            task = asyncio.create_task(process_one(app_doc))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
     
     finally:
+        watcher.unsubscribe()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
         await applier.close()
 
 
 if __name__ == "__main__":
-    asyncio.run(process_autonomous_applications())
\ No newline at end of file
+    if '--watch' in sys.argv:
+        asyncio.run(watch_autonomous_applications())
+    else:
+        asyncio.run(process_autonomous_applications())
\ No newline at end of file
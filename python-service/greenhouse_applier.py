@@ -11,26 +11,43 @@ JOBHUNT AI - SMART APPLICATION ENGINE V2.0 (FULLY FIXED)
 - Auto-renames resume to Candidate Name
 - REVIEW MODE: Fills form, highlights button, pauses for manual submit
 - REAL-TIME: Progress tracking and status updates
+- Retries form fill steps with backoff before giving up
 =============================================================================
 """
 
+import aiofiles
 import asyncio
+import email.utils
+import hashlib
+import heapq
+import orjson
 import logging
 import os
+import random
 import sys
+import time
 import httpx
 import re
-from datetime import datetime
+import shutil
+import sqlite3
+import threading
+import weakref
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, Optional, List
-from difflib import SequenceMatcher
+from functools import lru_cache
 
 # Load environment variables
 from dotenv import load_dotenv
 
 import firebase_admin
-from firebase_admin import credentials, firestore
+from firebase_admin import credentials, firestore, firestore_async
+from google.api_core.exceptions import NotFound
 from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout
+from rapidfuzz import fuzz, process
+from cachetools import LRUCache
+
+from rate_limit import AsyncTokenBucket, ATS_LIMITER
 
 def cleanup_old_screenshots(days_old: int = 7):
     """Delete screenshot files older than specified days"""
@@ -73,17 +90,246 @@ if not firebase_admin._apps:
         sys.exit(1)
     cred = credentials.Certificate(cred_path)
     firebase_admin.initialize_app(cred)
-db = firestore.client()
+# Native asyncio client: reads and writes are awaited directly, no thread hops.
+# SERVER_TIMESTAMP and Query constants still come from the shared firestore module.
+db = firestore_async.client()
+
+# Phone digits, and characters stripped from resume filenames (\w rather than
+# A-Za-z0-9 so non-ASCII names survive, as with str.isalnum)
+_NON_DIGIT = re.compile(r'\D')
+_UNSAFE_CHARS = re.compile(r'[^\w-]')
+# Runs of whitespace collapsed when normalizing question text for cache keys
+_WHITESPACE = re.compile(r'\s+')
+# Markdown code fences (```json, ```) around a model's JSON reply
+_FENCE_RE = re.compile(r'```\w*\n?')
+
+# Bytes per write when streaming a resume download to disk
+RESUME_CHUNK_SIZE = 64 * 1024
+
+# Element waits used instead of fixed sleeps
+PAGE_READY_SELECTOR = 'form, input:not([type="hidden"]), iframe[src*="greenhouse"], a:has-text("Apply"), button:has-text("Apply")'
+FORM_READY_SELECTOR = 'form, input[type="file"], iframe[src*="greenhouse"], iframe[src*="lever"], iframe[src*="ashby"]'
+CONFIRMATION_SELECTOR = 'text=/submitted|thank you|received|success/i'
+
+# ATS URLs whose page already holds the application form, so discovery
+# (iframe probes, Apply clicks) can be skipped
+KNOWN_ATS = [
+    (re.compile(r'(?:job-)?boards\.greenhouse\.io/[^/]+/jobs/\d+'), 'greenhouse'),
+    (re.compile(r'jobs\.lever\.co/[^/]+/[^/]+/apply'), 'lever'),
+    (re.compile(r'jobs\.ashbyhq\.com/[^/]+/[^/]+/application'), 'ashby'),
+]
+KNOWN_ATS_FORM_SELECTOR = 'form, input[type="file"]'
+
+# Greenhouse job URLs and the public boards API that lists their questions
+GREENHOUSE_JOB_URL = re.compile(r'(?:job-)?boards\.greenhouse\.io/([^/?#]+)/jobs/(\d+)')
+GREENHOUSE_JOB_API = 'https://boards-api.greenhouse.io/v1/boards/{board}/jobs/{job_id}'
+# Hosts most applications hit: each pooled page preconnects (DNS + TCP + TLS
+# inside that context's network stack) and the HTTP client opens a pooled
+# connection to the API hosts before the first application starts
+PREWARM_ORIGINS = ('https://boards.greenhouse.io', 'https://job-boards.greenhouse.io', 'https://jobs.lever.co', 'https://jobs.ashbyhq.com')
+PREWARM_API_URLS = ('https://boards-api.greenhouse.io/v1/boards', DEEPSEEK_API_URL)
+_PRECONNECT_HTML = ''.join(f'<link rel="preconnect" href="{origin}">' for origin in PREWARM_ORIGINS)
+# Questions fill_basic_fields and upload_resume already cover
+GREENHOUSE_STANDARD_FIELDS = frozenset({'first_name', 'last_name', 'email', 'phone', 'resume', 'resume_text', 'cover_letter', 'cover_letter_text'})
+
+# Lower-cased name/id of every file input, in document order
+_FILE_INPUTS_JS = """
+() => Array.from(document.querySelectorAll('input[type="file"]'))
+    .map(e => ({id: (e.id || '').toLowerCase(), name: (e.name || '').toLowerCase()}))
+"""
+
+# Form discovery, field and submit selectors, built once rather than per call
+IFRAME_SELECTORS = (
+    'iframe[id="grnhse_iframe"]',
+    'iframe[src*="greenhouse"]',
+    'iframe[src*="ashby"]',
+    'iframe[src*="lever"]',
+    'iframe[id="gnewton_iframe"]',
+)
+FORM_PRESENT_SELECTOR = 'form:visible, input[name="first_name"], input[name="name"]'
+APPLY_SELECTORS = (
+    'a[data-mapped="true"]',
+    'a:has-text("Apply to Job")',
+    'a:has-text("Apply Now")',
+    'button:has-text("Apply")',
+    'a:has-text("Apply")',
+    '[aria-label="Apply for this job"]',
+    '#apply_button',
+)
+SUBMIT_SELECTORS = (
+    'button#submit_app', 'input[type="submit"]', 'button[type="submit"]',
+    'button:has-text("Submit Application")', 'button:has-text("Submit")',
+)
+FIRST_NAME_SELECTORS = (
+    'input[name*="first" i][name*="name" i]', 'input[id*="first" i]',
+    '[autocomplete="given-name"]', 'input[name="name" i]',
+)
+LAST_NAME_SELECTORS = ('input[name*="last" i]', 'input[id*="last" i]', '[autocomplete="family-name"]')
+EMAIL_SELECTORS = ('input[type="email"]', 'input[name*="email" i]', '[autocomplete="email"]')
+PHONE_SELECTORS = ('input[type="tel"]', 'input[name*="phone" i]', '[autocomplete="tel"]')
+# Input types fill_basic_fields never types into
+UNFILLABLE_INPUT_TYPES = frozenset({'checkbox', 'radio', 'hidden', 'file', 'submit', 'button'})
+# Substrings of a file input's name/id that mark it as resume or cover letter
+RESUME_KWS = ('resume', 'cv', 'attach_resume', 'curriculum')
+COVER_KWS = ('cover', 'letter', 'motivation')
+
+# One evaluate per page/frame: empty visible fields (selects even when styled
+# hidden) with their label text and options, each tagged with data-ja-q so the
+# write can locate it without re-querying
+_SNAPSHOT_FIELDS_JS = """() => {
+    const fields = [];
+    document.querySelectorAll('input, select, textarea').forEach((el, i) => {
+        const tag = el.tagName.toLowerCase();
+        if (tag !== 'select' && (!el.offsetParent || getComputedStyle(el).visibility === 'hidden')) return;
+        if (el.type === 'hidden' || el.type === 'file') return;
+        const isChoice = el.type === 'radio' || el.type === 'checkbox';
+        if (!isChoice && el.value && el.value !== '0') return;
+        const labelEl = (el.id && document.querySelector('label[for="' + CSS.escape(el.id) + '"]'))
+            || el.closest('div, fieldset, label');
+        let label = labelEl ? labelEl.innerText || '' : '';
+        if (el.value && !isChoice) label = label.replace(el.value, '');
+        el.setAttribute('data-ja-q', String(i));
+        fields.push({
+            key: String(i), tag, type: el.type || '', id: el.id, name: el.name,
+            value: el.value, label,
+            options: tag === 'select'
+                ? Array.from(el.options).map(o => ({v: o.value, t: (o.innerText || '').trim()}))
+                : null,
+        });
+    });
+    return fields;
+}"""
+
+# Per matched element: visible and of a type fill_basic_fields may type into
+_FILLABLE_FLAGS_JS = """els => els.map(e =>
+    !!e.offsetParent && getComputedStyle(e).visibility !== 'hidden'
+    && !%s.includes((e.getAttribute('type') || 'text').toLowerCase()))""" % orjson.dumps(sorted(UNFILLABLE_INPUT_TYPES)).decode()
+
+# Requests aborted in every browser context; stylesheets stay so visibility
+# checks still see the real layout
+BLOCKED_RESOURCE_TYPES = frozenset({'image', 'media', 'font'})
+BLOCKED_URL_PARTS = (
+    'googletagmanager', 'google-analytics', 'doubleclick', 'segment.io',
+    'intercom', 'hotjar', 'fullstory', 'facebook.net',
+)
+
+# Resumes by sha1(URL + ETag/Last-Modified), kept across applications and runs
+RESUME_CACHE_DIR = Path("temp_resumes") / "cache"
+
+# Applications processed at once, each in its own pooled browser context
+MAX_CONCURRENT_APPLICATIONS = 3
+# Upper bound on one application, manual review included, so a hung page
+# can't hold a concurrency slot forever
+APP_TIMEOUT_SECONDS = 600
+# Form fill steps are retried with exponential backoff (FILL_RETRY_BASE * 2**n
+# seconds) when they fail, e.g. because the DOM re-rendered mid-fill
+FILL_ATTEMPTS = 3
+FILL_RETRY_BASE = 0.5
+
+# Randomized pauses between field fills; set HUMAN_DELAY=false for trusted or
+# headless runs where they only add wall-clock time
+HUMAN_DELAY_ENABLED = os.getenv('HUMAN_DELAY', 'true').lower() == 'true'
+
+# Shared HTTP client (created lazily, closed by SmartApplier.close). Keep-alive
+# slots cover every DEEPSEEK_LIMITER burst plus resume/API fetches for each
+# concurrent application, so steady traffic never re-handshakes
+HTTP_MAX_CONNECTIONS = 64
+HTTP_MAX_KEEPALIVE = 32
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Pooled HTTP/2 client reused by AI calls, resume downloads and ATS API fetches"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_KEEPALIVE),
+        )
+    return _http_client
+
+
+async def close_http_client():
+    """Close the shared HTTP client if it was created"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+# In-memory answers kept before least-recently-used ones are evicted
+AI_CACHE_SIZE = 10_000
 
 # AI Cache to prevent redundant API calls
-AI_CACHE = {}
+AI_CACHE = LRUCache(maxsize=AI_CACHE_SIZE)
+
+# Local answer cache that survives restarts, checked before Firestore
+AI_CACHE_DB_PATH = os.getenv('AI_CACHE_DB_PATH', 'ai_answers.sqlite3')
+
+_local_cache_conn: Optional[sqlite3.Connection] = None
+_local_cache_lock = threading.Lock()
+
+
+def _local_cache() -> sqlite3.Connection:
+    """SQLite connection for the local answer cache (call with _local_cache_lock held)"""
+    global _local_cache_conn
+    if _local_cache_conn is None:
+        _local_cache_conn = sqlite3.connect(AI_CACHE_DB_PATH, check_same_thread=False)
+        _local_cache_conn.execute(
+            'CREATE TABLE IF NOT EXISTS answers '
+            '(q_hash TEXT PRIMARY KEY, question TEXT, answer TEXT, used_at INTEGER)'
+        )
+    return _local_cache_conn
+
+
+def _local_cache_get(cache_key: str) -> Optional[str]:
+    with _local_cache_lock:
+        conn = _local_cache()
+        row = conn.execute('SELECT answer FROM answers WHERE q_hash = ?', (cache_key,)).fetchone()
+        if row:
+            conn.execute('UPDATE answers SET used_at = ? WHERE q_hash = ?', (int(time.time()), cache_key))
+            conn.commit()
+    return row[0] if row else None
+
+
+def _local_cache_set(cache_key: str, answer: str, question: str):
+    with _local_cache_lock:
+        conn = _local_cache()
+        conn.execute(
+            'INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?)',
+            (cache_key, question, answer, int(time.time()))
+        )
+        conn.commit()
+
+
+async def get_local_cached_answer(cache_key: str) -> Optional[str]:
+    """Get cached answer from the local SQLite cache"""
+    try:
+        return await asyncio.to_thread(_local_cache_get, cache_key)
+    except sqlite3.Error as e:
+        logger.debug(f"Local cache read error: {e}")
+        return None
+
+
+async def set_local_cached_answer(cache_key: str, answer: str, question: str = ''):
+    """Save answer to the local SQLite cache"""
+    try:
+        await asyncio.to_thread(_local_cache_set, cache_key, answer, question)
+    except sqlite3.Error as e:
+        logger.debug(f"Local cache write error: {e}")
 
 # AI Cache with Firestore persistence
+# Unwritten ai_cache documents by id, committed in batches by the progress flusher
+_pending_cache_answers: Dict[str, Dict] = {}
+# Early flush started when the cache buffer fills (kept so it isn't garbage-collected)
+_cache_flush_task: Optional[asyncio.Task] = None
+
 async def get_cached_answer(cache_key: str) -> Optional[str]:
     """Get cached answer from Firestore"""
     try:
         cached_ref = db.collection('ai_cache').document(cache_key)
-        doc = await asyncio.to_thread(cached_ref.get)
+        doc = await cached_ref.get()
         if doc.exists:
             data = doc.to_dict()
             # Optional: check timestamp if we want expiration
@@ -92,85 +338,178 @@ async def get_cached_answer(cache_key: str) -> Optional[str]:
         logger.debug(f"Cache read error: {e}")
     return None
 
-async def set_cached_answer(cache_key: str, answer: str):
-    """Save answer to Firestore cache"""
-    try:
-        cached_ref = db.collection('ai_cache').document(cache_key)
-        await asyncio.to_thread(cached_ref.set, {
-            'answer': answer,
-            'cachedAt': firestore.SERVER_TIMESTAMP,
-            'question': cache_key[:200]  # store truncated question
-        })
-    except Exception as e:
-        logger.debug(f"Cache write error: {e}")
+async def set_cached_answer(cache_key: str, answer: str, question: str = ''):
+    """Queue answer for the Firestore cache; written with the next progress flush"""
+    global _cache_flush_task
+    _pending_cache_answers[cache_key] = {
+        'answer': answer,
+        'cachedAt': firestore.SERVER_TIMESTAMP,
+        'question': question[:200]  # store truncated question
+    }
+    if len(_pending_cache_answers) >= WRITE_BATCH_SIZE and (_cache_flush_task is None or _cache_flush_task.done()):
+        _cache_flush_task = asyncio.create_task(flush_application_progress())
+
+# ============================================================================
+# Rate Limiting
+# ============================================================================
+
+# DeepSeek request ceiling
+DEEPSEEK_LIMITER = AsyncTokenBucket(rate=5.0, capacity=5.0, jitter=0.1)
+# DeepSeek requests in flight at once; slow replies hold a slot, so a
+# backlog queues here instead of piling up connections
+DEEPSEEK_MAX_IN_FLIGHT = 10
+_deepseek_slots = asyncio.Semaphore(DEEPSEEK_MAX_IN_FLIGHT)
 
 # ============================================================================
 # Real-time Progress Updates
 # ============================================================================
 
+# Seconds between background writes of buffered progress updates
+PROGRESS_FLUSH_INTERVAL = 0.5
+# Updates per Firestore WriteBatch commit (Firestore caps a batch at 500)
+WRITE_BATCH_SIZE = 400
+
+# Latest unwritten progress per app_id; the lock orders flushes with status writes
+_pending_progress: Dict[str, Dict] = {}
+_progress_lock = asyncio.Lock()
+
+
+async def _commit_merge_sets(collection: str, docs: Dict[str, Dict]):
+    """
+    Merge-set {doc_id: data} into a collection in WriteBatch commits.
+    Only for collections where an upsert is wanted (ai_cache).
+    """
+    coll_ref = db.collection(collection)
+    items = list(docs.items())
+    for start in range(0, len(items), WRITE_BATCH_SIZE):
+        batch = db.batch()
+        for doc_id, data in items[start:start + WRITE_BATCH_SIZE]:
+            batch.set(coll_ref.document(doc_id), data, merge=True)
+        await batch.commit()
+
+
+async def _commit_application_updates(updates: Dict[str, Dict]):
+    """
+    Apply {app_id: update} to applications in WriteBatch commits.
+    An application deleted mid-run fails its whole (atomic) chunk with NotFound;
+    that chunk is retried doc by doc and the missing ones are dropped. Never
+    merge-set here: it would resurrect the deleted doc as a partial one.
+    """
+    apps_ref = db.collection('applications')
+    items = list(updates.items())
+    for start in range(0, len(items), WRITE_BATCH_SIZE):
+        chunk = items[start:start + WRITE_BATCH_SIZE]
+        batch = db.batch()
+        for app_id, update in chunk:
+            batch.update(apps_ref.document(app_id), update)
+        try:
+            await batch.commit()
+        except NotFound:
+            for app_id, update in chunk:
+                try:
+                    await apps_ref.document(app_id).update(update)
+                except NotFound:
+                    logger.info(f"Application {app_id} was deleted, dropping its update")
+
+
+def _requeue(buffer: Dict[str, Dict], failed: Dict[str, Dict]):
+    """Put failed writes back for the next flush; fields buffered since are newer and win"""
+    for doc_id, data in failed.items():
+        buffer[doc_id] = {**data, **buffer.get(doc_id, {})}
+
+
 async def update_application_progress(app_id: str, status: str, progress: int, message: str = ""):
-    """Update application progress in real-time"""
-    try:
-        update_data = {
-            'status': status,
-            'progress': progress,  # 0-100
-            'progressMessage': message,
-            'updatedAt': firestore.SERVER_TIMESTAMP
-        }
-        
-        if status == 'applied':
-            update_data['appliedAt'] = firestore.SERVER_TIMESTAMP
-        
-        db.collection('applications').document(app_id).update(update_data)
-        logger.info(f"📊 Progress: {progress}% - {message}")
+    """Record application progress; the flusher writes the latest state per app"""
+    update_data = {
+        'status': status,
+        'progress': progress,  # 0-100
+        'progressMessage': message,
+        'updatedAt': firestore.SERVER_TIMESTAMP
+    }
     
-    except Exception as e:
-        logger.error(f"Error updating progress: {e}")
+    if status == 'applied':
+        update_data['appliedAt'] = firestore.SERVER_TIMESTAMP
+    
+    _pending_progress[app_id] = update_data
+    logger.info(f"📊 Progress: {progress}% - {message}")
+
+
+async def flush_application_progress():
+    """Write buffered progress updates and AI cache entries in batched commits"""
+    global _pending_progress, _pending_cache_answers
+    async with _progress_lock:
+        pending, _pending_progress = _pending_progress, {}
+        cache_docs, _pending_cache_answers = _pending_cache_answers, {}
+        # Separate batches, so a failure on one side can't take the other down
+        if pending:
+            try:
+                await _commit_application_updates(pending)
+            except Exception as e:
+                logger.error(f"Error updating progress: {e}")
+                _requeue(_pending_progress, pending)
+        if cache_docs:
+            try:
+                await _commit_merge_sets('ai_cache', cache_docs)
+            except Exception as e:
+                logger.error(f"Error writing AI cache: {e}")
+                _requeue(_pending_cache_answers, cache_docs)
+
+
+async def progress_flusher():
+    """Background task: flush buffered progress and cache writes every PROGRESS_FLUSH_INTERVAL"""
+    while True:
+        await asyncio.sleep(PROGRESS_FLUSH_INTERVAL)
+        await flush_application_progress()
 
 
 # ============================================================================
 # AI Question Answering (with Caching & Retry)
 # ============================================================================
 
-async def answer_question_with_ai(question: str, user_profile: Dict, max_retries: int = 3) -> str:
-    """Use DeepSeek AI to answer custom application questions (ENHANCED with retry)"""
-    
-    # 1. Check Cache
-    cache_key = question.lower().strip()[:100]  # Use first 100 chars as key
-    if cache_key in AI_CACHE:
-        logger.info(f"  💾 Cached Answer (memory): {AI_CACHE[cache_key]}")
-        return AI_CACHE[cache_key]
+# Profile fields the answer prompt reads, with their defaults
+PROMPT_PROFILE_FIELDS = (
+    ('firstName', ''),
+    ('lastName', ''),
+    ('currentTitle', 'Senior Product Manager'),
+    ('yearsOfExperience', 10),
+    ('location', ''),
+    ('email', ''),
+    ('eligibleToWorkInUS', True),
+    ('requiresSponsorship', False),
+    ('educationSummary', 'MBA from Indiana University'),
+)
 
-    # Check Firestore persistent cache
-    cached_answer = await get_cached_answer(cache_key)
-    if cached_answer:
-        logger.info(f"  💾 Cached Answer (firestore): {cached_answer}")
-        AI_CACHE[cache_key] = cached_answer
-        return cached_answer
 
-    if not DEEPSEEK_API_KEY:
-        logger.error("❌ DeepSeek API Key is missing! Check .env.local")
-        return "Not specified"
+def build_prompt_prefix(user_profile: Dict) -> str:
+    """
+    Question-independent part of the answer prompt: profile + instructions.
+    Built once per profile (see get_user_profile); keeping it first and
+    byte-identical across questions lets DeepSeek's prefix cache hit.
+    """
+    return _profile_prompt(tuple(str(user_profile.get(key, default)) for key, default in PROMPT_PROFILE_FIELDS))
+
 
+@lru_cache(maxsize=64)
+def _profile_prompt(fields: tuple) -> str:
+    """Prompt prefix for one set of PROMPT_PROFILE_FIELDS values, formatted once"""
+    first_name, last_name, title, years, location, email, eligible, sponsorship, education = fields
     profile_summary = f"""
-Candidate: {user_profile.get('firstName', '')} {user_profile.get('lastName', '')}
-Current Title: {user_profile.get('currentTitle', 'Senior Product Manager')}
-Experience: {user_profile.get('yearsOfExperience', 10)} years
-Location: {user_profile.get('location', '')}
-Email: {user_profile.get('email', '')}
-Eligible to work in US: {user_profile.get('eligibleToWorkInUS', True)}
-Requires Sponsorship: {user_profile.get('requiresSponsorship', False)}
-Education: {user_profile.get('educationSummary', 'MBA from Indiana University')}
+Candidate: {first_name} {last_name}
+Current Title: {title}
+Experience: {years} years
+Location: {location}
+Email: {email}
+Eligible to work in US: {eligible}
+Requires Sponsorship: {sponsorship}
+Education: {education}
 Key Skills: ML Engineering, Product Management, Python, Azure ML, Connected Vehicles
 """
 
-    prompt = f"""You are filling out a job application form. Answer this question based on the candidate's profile.
+    return f"""You are filling out a job application form. Answer the question at the end based on the candidate's profile.
 
 CANDIDATE PROFILE:
 {profile_summary}
 
-QUESTION: {question}
-
 INSTRUCTIONS:
 - For yes/no questions, answer ONLY "Yes" or "No"
 - For work authorization: Answer "Yes" if eligible to work in US
@@ -180,49 +519,125 @@ INSTRUCTIONS:
 - Keep answers concise (1-3 words for short answers, 1-2 sentences for open-ended)
 - Be professional and confident
 
-ANSWER (no explanation, just the answer):"""
+"""
+
+
+def question_cache_key(question: str, user_profile: Dict) -> str:
+    """
+    BLAKE2b-128 digest of the full normalized question, the user id and the
+    prompt prefix, so answers never leak across users or outlive a profile
+    edit. Also used as the Firestore document id.
+    """
+    # Required-field asterisks are dropped so rendered labels match API labels
+    normalized = _WHITESPACE.sub(' ', question.lower()).strip(' *')
+    h = hashlib.blake2b(digest_size=16)
+    h.update(normalized.encode())
+    h.update(b'\0' + user_profile.get('id', '').encode())
+    h.update(b'\0' + (user_profile.get('promptPrefix') or build_prompt_prefix(user_profile)).encode())
+    return h.hexdigest()
+
+
+def clean_answer(text: str) -> str:
+    """Strip quotes and a leading 'Answer:' from a model answer"""
+    answer = text.strip().replace('"', '').replace("'", '')
+    if answer.lower().startswith('answer:'):
+        answer = answer[7:].strip()
+    return answer
+
+
+async def lookup_cached_answer(cache_key: str) -> Optional[str]:
+    """Check the memory, local disk and Firestore caches in turn"""
+    if cache_key in AI_CACHE:
+        logger.info(f"  💾 Cached Answer (memory): {AI_CACHE[cache_key]}")
+        return AI_CACHE[cache_key]
+
+    cached_answer = await get_local_cached_answer(cache_key)
+    if cached_answer:
+        logger.info(f"  💾 Cached Answer (local): {cached_answer}")
+        AI_CACHE[cache_key] = cached_answer
+        return cached_answer
+
+    cached_answer = await get_cached_answer(cache_key)
+    if cached_answer:
+        logger.info(f"  💾 Cached Answer (firestore): {cached_answer}")
+        AI_CACHE[cache_key] = cached_answer
+        await set_local_cached_answer(cache_key, cached_answer)
+        return cached_answer
+
+    return None
+
+
+async def remember_answer(cache_key: str, answer: str, question: str = ''):
+    """Store an AI answer in every cache tier"""
+    AI_CACHE[cache_key] = answer
+    await set_local_cached_answer(cache_key, answer, question)
+    # Update Firestore cache (batched by the progress flusher)
+    await set_cached_answer(cache_key, answer, question)
+
+
+# DeepSeek statuses worth retrying; other non-200s (400/401/403...) fail at once
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def parse_retry_after(headers) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None"""
+    value = headers.get('retry-after')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+async def call_deepseek(prompt: str, max_tokens: int = 100, max_retries: int = 3) -> Optional[str]:
+    """Send one prompt to DeepSeek and return the raw reply, or None on failure"""
+    if not DEEPSEEK_API_KEY:
+        logger.error("❌ DeepSeek API Key is missing! Check .env.local")
+        return None
 
     # Retry logic with exponential backoff
     for attempt in range(max_retries):
         try:
-            async with httpx.AsyncClient() as client:
+            async with _deepseek_slots:
+                await DEEPSEEK_LIMITER.acquire()
+                client = get_http_client()
                 response = await client.post(
                     DEEPSEEK_API_URL,
                     headers={
                         'Authorization': f'Bearer {DEEPSEEK_API_KEY}',
                         'Content-Type': 'application/json'
                     },
-                    json={
+                    content=orjson.dumps({
                         'model': 'deepseek-chat',
                         'messages': [{'role': 'user', 'content': prompt}],
                         'temperature': 0.1,
-                        'max_tokens': 100
-                    },
-                    timeout=30.0
+                        'max_tokens': max_tokens
+                    })
                 )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    answer = result['choices'][0]['message']['content'].strip()
-                    answer = answer.replace('"', '').replace("'", '')
-                    if answer.lower().startswith('answer:'):
-                        answer = answer[7:].strip()
-                    
-                    logger.info(f"  🤖 AI Answer: {answer}")
-                    # Update Cache
-                    AI_CACHE[cache_key] = answer
-                    # Update Firestore cache (fire and forget)
-                    asyncio.create_task(set_cached_answer(cache_key, answer))
-                    return answer
-                elif response.status_code == 429:
-                    # Rate limited - wait and retry
-                    wait_time = 2 ** attempt  # Exponential backoff: 1s, 2s, 4s
-                    logger.warning(f"  ⏳ Rate limited, retrying in {wait_time}s...")
-                    await asyncio.sleep(wait_time)
-                    continue
-                else:
-                    logger.error(f"DeepSeek API error: {response.status_code}")
-                    return "Not specified"
+            
+            if response.status_code == 200:
+                result = orjson.loads(response.content)
+                return result['choices'][0]['message']['content']
+            elif response.status_code in RETRYABLE_STATUSES:
+                if attempt == max_retries - 1:
+                    logger.error(f"DeepSeek API error: {response.status_code} after retries")
+                    return None
+                # Full-jitter backoff, never shorter than the server's Retry-After
+                wait_time = max(parse_retry_after(response.headers) or 0, random.uniform(0, 2 ** attempt))
+                logger.warning(f"  ⏳ DeepSeek {response.status_code}, retrying in {wait_time:.1f}s...")
+                await asyncio.sleep(wait_time)
+                continue
+            else:
+                logger.error(f"DeepSeek API error: {response.status_code}")
+                return None
         
         except asyncio.TimeoutError:
             if attempt < max_retries - 1:
@@ -230,72 +645,372 @@ ANSWER (no explanation, just the answer):"""
                 await asyncio.sleep(2 ** attempt)
                 continue
             logger.error("AI request timed out after retries")
-            return "Not specified"
+            return None
         except Exception as e:
             logger.error(f"Error calling AI: {e}")
             if attempt < max_retries - 1:
                 await asyncio.sleep(2 ** attempt)
                 continue
-            return "Not specified"
+            return None
+    
+    return None
+
+
+async def answer_question_with_ai(question: str, user_profile: Dict, max_retries: int = 3) -> str:
+    """Use DeepSeek AI to answer custom application questions (ENHANCED with retry)"""
+    
+    # 1. Check Cache
+    cache_key = question_cache_key(question, user_profile)
+    cached_answer = await lookup_cached_answer(cache_key)
+    if cached_answer:
+        return cached_answer
+
+    prompt = (
+        (user_profile.get('promptPrefix') or build_prompt_prefix(user_profile))
+        + f"""QUESTION: {question}
+
+ANSWER (no explanation, just the answer):"""
+    )
+
+    reply = await call_deepseek(prompt, max_retries=max_retries)
+    if reply is None:
+        return "Not specified"
+
+    answer = clean_answer(reply)
+    logger.info(f"  🤖 AI Answer: {answer}")
+    await remember_answer(cache_key, answer, question)
+    return answer
+
+
+async def answer_questions_batch(questions: List[str], user_profile: Dict) -> List[str]:
+    """
+    Answer several form questions with one DeepSeek request.
+    Cached questions are served from cache; if the batched reply can't be
+    parsed, the uncached questions are answered one at a time instead.
+    """
+    keys = [question_cache_key(question, user_profile) for question in questions]
+    answers = [None] * len(questions)
+    
+    # Repeated questions share one cache lookup and one slot in the request
+    by_key = {}
+    for i, key in enumerate(keys):
+        by_key.setdefault(key, []).append(i)
+    misses = []
+    for key, indexes in by_key.items():
+        cached_answer = await lookup_cached_answer(key)
+        if cached_answer:
+            for i in indexes:
+                answers[i] = cached_answer
+        else:
+            misses.append(indexes[0])
+
+    if not misses:
+        return answers
+
+    numbered = "\n".join(f"{n}. {questions[i]}" for n, i in enumerate(misses, 1))
+    prompt = (
+        (user_profile.get('promptPrefix') or build_prompt_prefix(user_profile))
+        + f"""QUESTIONS:
+{numbered}
+
+Return ONLY a JSON array of strings, one answer per question in order:"""
+    )
+
+    reply = await call_deepseek(prompt, max_tokens=100 * len(misses))
+    if reply is None:
+        return ["Not specified" if answer is None else answer for answer in answers]
+
+    try:
+        batch = orjson.loads(_FENCE_RE.sub('', reply).strip())
+    except ValueError:
+        batch = None
+    
+    if not isinstance(batch, list) or len(batch) != len(misses):
+        logger.warning("  ⚠️  Batched AI reply unusable, answering questions individually")
+        singles = await asyncio.gather(*[answer_question_with_ai(questions[i], user_profile) for i in misses])
+    else:
+        singles = []
+        for i, raw in zip(misses, batch):
+            answer = clean_answer(str(raw))
+            logger.info(f"  🤖 AI Answer: {questions[i][:40]}... → {answer}")
+            await remember_answer(keys[i], answer, questions[i])
+            singles.append(answer)
+
+    for i, answer in zip(misses, singles):
+        for j in by_key[keys[i]]:
+            answers[j] = answer
+    return answers
+
+
+async def prefetch_fields(job_url: str) -> List[Dict]:
+    """
+    Custom questions of a Greenhouse job from the public boards API, as
+    {label, type, required}, without rendering the page. Empty for other
+    ATSes or if the API call fails.
+    """
+    match = GREENHOUSE_JOB_URL.search(job_url)
+    if not match:
+        return []
+    
+    board, job_id = match.groups()
+    try:
+        response = await get_http_client().get(
+            GREENHOUSE_JOB_API.format(board=board, job_id=job_id),
+            params={'questions': 'true'}, timeout=10.0
+        )
+        response.raise_for_status()
+        questions = orjson.loads(response.content).get('questions') or []
+    except (httpx.HTTPError, ValueError) as e:
+        logger.debug(f"Greenhouse API prefetch failed: {e}")
+        return []
     
-    return "Not specified"
+    fields = []
+    for q in questions:
+        inputs = q.get('fields') or [{}]
+        if any(f.get('name') in GREENHOUSE_STANDARD_FIELDS or f.get('type') in ('input_file', 'input_hidden') for f in inputs):
+            continue
+        fields.append({
+            'label': q.get('label', ''),
+            'type': inputs[0].get('type', ''),
+            'required': bool(q.get('required')),
+        })
+    return fields
+
+
+async def prefetch_answers(job_url: str, user_data: Dict) -> int:
+    """
+    Answer a job's known custom questions ahead of the page load so
+    handle_custom_questions finds them cached. Returns how many were sent.
+    """
+    try:
+        fields = await prefetch_fields(job_url)
+        rules = build_question_rules(user_data)
+        labels = [f['label'] for f in fields if f['label'] and not match_rule(rules, f['label'].lower().strip())]
+        if labels:
+            logger.info(f"  🔮 Pre-answering {len(labels)} questions from the Greenhouse API")
+            await answer_questions_batch(labels, user_data)
+        return len(labels)
+    except Exception as e:
+        logger.debug(f"Answer prefetch failed: {e}")
+        return 0
 
 
 # ============================================================================
 # Resume Management
 # ============================================================================
 
-async def download_resume(resume_url: str, filename_prefix: str) -> Optional[str]:
+async def download_resume(resume_url: str, filename_prefix: str, subdir: str = '') -> Optional[str]:
     """Download resume and save with professional filename"""
     try:
-        temp_dir = Path("temp_resumes")
-        temp_dir.mkdir(exist_ok=True)
+        # Separate subdir per resume so two users' files never collide by name
+        temp_dir = Path("temp_resumes") / subdir
+        temp_dir.mkdir(parents=True, exist_ok=True)
+        
+        file_ext = '.pdf'
+        if 'docx' in resume_url.lower():
+            file_ext = '.docx'
+        
+        # Sanitize filename
+        safe_name = _UNSAFE_CHARS.sub('', filename_prefix)
+        file_path = temp_dir / f"{safe_name}{file_ext}"
+        
+        client = get_http_client()
+        
+        # Reuse an earlier download of the same resume version if we have one
+        cache_path = await _resume_cache_path(client, resume_url, file_ext)
+        if cache_path and cache_path.exists():
+            await asyncio.to_thread(shutil.copyfile, cache_path, file_path)
+            logger.info(f"  💾 Resume from cache: {file_path.name}")
+            return str(file_path)
         
         logger.info(f"  📥 Downloading resume from Firebase...")
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(resume_url, timeout=60.0, follow_redirects=True)
-            
-            if response.status_code == 200:
-                file_ext = '.pdf'
-                if 'docx' in resume_url.lower():
-                    file_ext = '.docx'
-                
-                # Sanitize filename
-                safe_name = "".join(x for x in filename_prefix if x.isalnum() or x in "_-")
-                file_path = temp_dir / f"{safe_name}{file_ext}"
-                
-                file_path.write_bytes(response.content)
-                
-                file_size = len(response.content) / 1024
-                logger.info(f"  ✅ Resume saved as: {file_path.name} ({file_size:.1f} KB)")
-                return str(file_path)
-            else:
+        async with client.stream('GET', resume_url, timeout=60.0) as response:
+            if response.status_code != 200:
                 logger.error(f"Failed to download resume: HTTP {response.status_code}")
                 return None
+            
+            # Stream straight to disk rather than buffering the whole file; the
+            # .part name keeps a cut-off download from being uploaded or cached
+            expected = int(response.headers.get('content-length') or 0)
+            part_path = file_path.with_name(file_path.name + '.part')
+            size = 0
+            try:
+                async with aiofiles.open(part_path, 'wb') as f:
+                    async for chunk in response.aiter_bytes(RESUME_CHUNK_SIZE):
+                        await f.write(chunk)
+                        size += len(chunk)
+                # Content-Length is the encoded size, so only compare unencoded bodies
+                if expected and size != expected and not response.headers.get('content-encoding'):
+                    raise httpx.ReadError(f"incomplete body: {size} of {expected} bytes")
+                os.replace(part_path, file_path)
+            finally:
+                if part_path.exists():
+                    part_path.unlink()
+        
+        if cache_path:
+            await asyncio.to_thread(_store_cached_resume, file_path, cache_path)
+        
+        logger.info(f"  ✅ Resume saved as: {file_path.name} ({size / 1024:.1f} KB)")
+        return str(file_path)
     
     except Exception as e:
         logger.error(f"Error downloading resume: {e}")
         return None
 
 
+async def _resume_cache_path(client: httpx.AsyncClient, resume_url: str, file_ext: str) -> Optional[Path]:
+    """
+    Cache location for the current version of a resume, keyed on the URL
+    plus the ETag (or Last-Modified) from a HEAD request. None if the server
+    gives no version header, in which case the resume isn't cached.
+    """
+    try:
+        head = await client.head(resume_url, timeout=15.0)
+    except httpx.HTTPError as e:
+        logger.debug(f"Resume HEAD failed: {e}")
+        return None
+    
+    version = head.headers.get('etag') or head.headers.get('last-modified')
+    if head.status_code != 200 or not version:
+        return None
+    
+    key = hashlib.sha1((resume_url + version).encode()).hexdigest()
+    return RESUME_CACHE_DIR / f"{key}{file_ext}"
+
+
+def _store_cached_resume(file_path: Path, cache_path: Path):
+    """Copy a fresh download into the resume cache (atomically, for concurrent runs)"""
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    shutil.copyfile(file_path, tmp_path)
+    os.replace(tmp_path, cache_path)
+
+
 # ============================================================================
 # Helper Functions
 # ============================================================================
 
+@lru_cache(maxsize=256)
 def format_phone_number(phone: str) -> str:
     """Format phone to (XXX) XXX-XXXX"""
     if not phone:
         return ""
-    digits = re.sub(r'\D', '', phone)  # Remove non-digits
+    digits = _NON_DIGIT.sub('', phone)  # Remove non-digits
     if len(digits) == 10:
         return f"({digits[:3]}) {digits[3:6]}-{digits[6:]}"
     elif len(digits) == 11 and digits[0] == '1':
         return f"({digits[1:4]}) {digits[4:7]}-{digits[7:]}"
     return phone  # Return as-is if format unknown
 
+def build_question_rules(user_data: Dict) -> Dict:
+    """Keyword -> answer rules for custom questions: defaults merged with dashboard rules"""
+    linkedin_url = user_data.get('linkedinUrl', 'https://linkedin.com/in/chandratalluri')
+    if '/in/' not in linkedin_url:
+        username = linkedin_url.split('/')[-1] or 'chandratalluri'
+        linkedin_url = f'https://linkedin.com/in/{username}'
+
+    rules = {
+        'gender': 'Male', 
+        'race': 'Asian', 
+        'veteran': 'I am not a protected veteran',
+        'disability': 'No',
+        'authorized': 'Yes',
+        'sponsorship': 'No',
+        'relocate': 'Yes',
+        'remote': 'Yes',
+        'linkedin': linkedin_url,
+        'website': 'https://chandratalluri.com',
+        'portfolio': 'https://chandratalluri.com',
+        'github': 'https://github.com/chandratalluri',
+        'hear about': 'LinkedIn',
+    }
+    
+    if 'custom_rules' in user_data:
+        rules.update(user_data['custom_rules'])
+    return rules
+
+
+@lru_cache(maxsize=64)
+def compile_rule_matcher(keywords: tuple):
+    """
+    One alternation over every rule keyword, built once per distinct rule set.
+    None when there is nothing to pre-filter (no keywords, or an empty one,
+    which matches every label).
+    """
+    if not keywords or not all(keywords):
+        return None
+    return re.compile('|'.join(map(re.escape, keywords)))
+
+
+def match_rule(rules: Dict, label_clean: str):
+    """Return (keyword, answer) for the earliest-listed rule found in the label, or None"""
+    # The single scan rejects labels no rule mentions; only labels with a hit
+    # walk the rules in order, since an alternation reports one keyword per
+    # position and could hide an earlier-listed, shorter one
+    pattern = compile_rule_matcher(tuple(rules))
+    if pattern is not None and not pattern.search(label_clean):
+        return None
+    for keyword, answer in rules.items():
+        if keyword in label_clean:
+            return keyword, answer
+    return None
+
+
+# Option words that satisfy a plain Yes/No answer regardless of fuzzy score
+YES_TOKENS = frozenset({'yes', 'authorized', 'eligible'})
+NO_TOKENS = frozenset({'no', 'not', 'none'})
+ANSWER_TOKENS = {'yes': YES_TOKENS, 'no': NO_TOKENS}
+# Minimum WRatio (0-100) for a dropdown option to count as a match
+OPTION_SCORE_CUTOFF = 40
+_WORD = re.compile(r'\w+')
+
+
+def normalize_options(options: List[Dict]) -> List[tuple]:
+    """(value, lower-cased text, word set) per real <option>, skipping placeholders"""
+    normalized = []
+    for opt in options:
+        text = opt['t'].lower().strip()
+        if opt['v'] and text and 'select' not in text:
+            normalized.append((opt['v'], text, frozenset(_WORD.findall(text))))
+    return normalized
+
+
+def best_option_value(answer: str, options: List[tuple]) -> Optional[str]:
+    """Value of the normalized option that best fits the answer, or None if nothing clears the cutoff"""
+    if not options:
+        return None
+    
+    answer_clean = answer.lower().strip()
+    wanted = ANSWER_TOKENS.get(answer_clean)
+    if wanted:
+        for value, _, tokens in options:
+            if tokens & wanted:
+                return value
+    
+    choices = {value: text for value, text, _ in options}
+    match = process.extractOne(answer_clean, choices, scorer=fuzz.WRatio, score_cutoff=OPTION_SCORE_CUTOFF)
+    return match[2] if match else None
+
+# Attached frames per page (insertion-ordered dict used as a set), kept
+# current by frameattached/framedetached events once track_frames is called
+_live_frames = weakref.WeakKeyDictionary()
+
+
+def track_frames(page):
+    """Start event-based frame tracking so safe_frames needn't probe every frame"""
+    frames = dict.fromkeys(page.frames)
+    page.on('frameattached', lambda frame: frames.setdefault(frame))
+    page.on('framedetached', lambda frame: frames.pop(frame, None))
+    _live_frames[page] = frames
+
+
 def safe_frames(page) -> List:
     """Safely iterate frames, skipping detached ones"""
+    tracked = _live_frames.get(page)
+    if tracked is not None:
+        return list(tracked)
+    
     frames = []
     for frame in page.frames:
         try:
@@ -306,23 +1021,64 @@ def safe_frames(page) -> List:
             continue
     return frames
 
+async def evaluate_in_frames(page, script: str) -> List:
+    """Run a script in the page and every frame concurrently; (context, result) for each that succeeds"""
+    contexts = [page, *safe_frames(page)]
+    results = await asyncio.gather(*[ctx.evaluate(script) for ctx in contexts], return_exceptions=True)
+    return [(ctx, result) for ctx, result in zip(contexts, results) if not isinstance(result, BaseException)]
+
+
+async def wait_for_mutation(page, selector: str, timeout_ms: int) -> bool:
+    """
+    Wait for a plain CSS selector to match, re-checking on DOM mutations
+    instead of Playwright's rAF polling. True if it matched in time.
+    """
+    try:
+        await page.wait_for_function(
+            'sel => !!document.querySelector(sel)',
+            arg=selector, polling='mutation', timeout=timeout_ms
+        )
+        return True
+    except Exception:
+        # Timed out, or the page navigated away mid-wait
+        return False
+
+
+async def first_visible(ctx, selectors):
+    """First visible element matching any of the selectors, in order, or None"""
+    for selector in selectors:
+        el = await ctx.query_selector(selector)
+        if el and await el.is_visible():
+            return el
+    return None
+
+PENDING_STATUSES = ('pending', 'queued')
+PENDING_LIMIT = 10
+# Fields process_application reads (plus appliedAt for the merge); nothing else is transferred
+PENDING_FIELDS = ('userId', 'jobUrl', 'jobTitle', 'company', 'appliedAt')
+
+
 async def get_pending_applications():
-    """Fetch applications that need processing"""
+    """Fetch applications that need processing (newest first)"""
     try:
-        applications = (
-            db.collection('applications')
-            .where('method', '==', 'auto-apply')
-            .where('status', 'in', ['pending', 'queued'])
+        # One equality query per status, run in parallel; each is served
+        # directly by the (method, status, appliedAt) index
+        apps_ref = db.collection('applications').select(PENDING_FIELDS).where('method', '==', 'auto-apply')
+        queries = [
+            apps_ref.where('status', '==', status)
             .order_by('appliedAt', direction=firestore.Query.DESCENDING)
-            .limit(10)
-            .stream()
-        )
+            .limit(PENDING_LIMIT)
+            for status in PENDING_STATUSES
+        ]
+        snapshots = await asyncio.gather(*[_stream_all(q) for q in queries])
         
         results = []
-        for app in applications:
+        for app in heapq.merge(*snapshots, key=_applied_at, reverse=True):
             data = app.to_dict()
             data['id'] = app.id
             results.append(data)
+            if len(results) == PENDING_LIMIT:
+                break
         
         logger.info(f"Found {len(results)} pending applications")
         return results
@@ -332,16 +1088,28 @@ async def get_pending_applications():
         return []
 
 
+async def _stream_all(query) -> List:
+    """All snapshots from an async query stream"""
+    return [snapshot async for snapshot in query.stream()]
+
+
+def _applied_at(snapshot) -> float:
+    """Sort key for application snapshots (appliedAt as a timestamp)"""
+    applied_at = snapshot.to_dict().get('appliedAt')
+    return applied_at.timestamp() if applied_at else 0.0
+
+
 async def get_user_profile(user_id: str) -> Dict:
     """Fetch user profile matching YOUR Firebase schema"""
     try:
-        user_doc = db.collection('users').document(user_id).get()
+        user_doc = await db.collection('users').document(user_id).get()
         
         if not user_doc.exists:
             logger.error(f"User {user_id} not found")
             return {}
         
         data = user_doc.to_dict()
+        data['id'] = user_id
         
         display_name = data.get('displayName', 'Chandra Talluri')
         name_parts = display_name.strip().split()
@@ -385,6 +1153,9 @@ async def get_user_profile(user_id: str) -> Dict:
                     data['custom_rules'][key] = q['answer']
             logger.info(f"  📋 Loaded {len(data['custom_rules'])} custom Q&A rules")
         
+        # Answer prompt prefix, built once per application instead of per question
+        data['promptPrefix'] = build_prompt_prefix(data)
+        
         logger.info(f"✅ Profile loaded: {data.get('firstName')} {data.get('lastName')}")
         
         return data
@@ -408,7 +1179,10 @@ async def update_application_status(app_id: str, status: str, error_msg: str = N
         if status == 'applied':
             update_data['appliedAt'] = firestore.SERVER_TIMESTAMP
         
-        db.collection('applications').document(app_id).update(update_data)
+        # Fold in any buffered progress so a later flush can't overwrite this status
+        async with _progress_lock:
+            update_data = {**_pending_progress.pop(app_id, {}), **update_data}
+            await db.collection('applications').document(app_id).update(update_data)
         logger.info(f"📝 Firebase updated: {status}")
     
     except Exception as e:
@@ -421,15 +1195,21 @@ async def update_application_status(app_id: str, status: str, error_msg: str = N
 
 class SmartApplier:
     def __init__(self):
+        self._playwright = None
         self.browser = None
-        self.context = None
+        self._contexts = []
+        self._page_pool: Optional[asyncio.Queue] = None
         self.stats = {'processed': 0, 'successful': 0, 'failed': 0}
+        self._review_lock = asyncio.Lock()  # one manual review prompt at a time
+        self._progress_task: Optional[asyncio.Task] = None
+        # (user_id, sha1(resume_url)) -> download task, shared for the batch
+        self._resume_cache: Dict[tuple, asyncio.Task] = {}
     
     async def initialize(self):
-        """Initialize browser"""
-        playwright = await async_playwright().start()
+        """Initialize browser and one isolated context + page per concurrent application"""
+        self._playwright = await async_playwright().start()
         
-        self.browser = await playwright.chromium.launch(
+        self.browser = await self._playwright.chromium.launch(
             headless=False,
             args=[
                 '--disable-blink-features=AutomationControlled',
@@ -438,22 +1218,137 @@ class SmartApplier:
             ]
         )
         
-        self.context = await self.browser.new_context(
-            viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        )
+        # Pages are reused across applications, each in its own context so
+        # concurrent applications don't share cookies and storage
+        self._page_pool = asyncio.Queue()
+        pages = []
+        for _ in range(MAX_CONCURRENT_APPLICATIONS):
+            context = await self.browser.new_context(
+                viewport={'width': 1920, 'height': 1080},
+                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+            )
+            await context.route('**/*', self._block_heavy_requests)
+            self._contexts.append(context)
+            pages.append(await self._new_page(context))
+        
+        await self._prewarm_connections(pages)
+        for page in pages:
+            self._page_pool.put_nowait(page)
+        self._progress_task = asyncio.create_task(progress_flusher())
         
         logger.info("🌐 Browser initialized")
     
+    async def _block_heavy_requests(self, route):
+        """Context route handler: abort blocked resources, continue the rest"""
+        request = route.request
+        if request.resource_type in BLOCKED_RESOURCE_TYPES or any(part in request.url for part in BLOCKED_URL_PARTS):
+            await route.abort()
+        else:
+            await route.continue_()
+    
+    async def _prewarm_connections(self, pages):
+        """Preconnect pages to the common ATS hosts and warm the HTTP client's pool"""
+        client = get_http_client()
+        await asyncio.gather(
+            *[page.set_content(_PRECONNECT_HTML) for page in pages],
+            *[client.head(url, timeout=3.0) for url in PREWARM_API_URLS],
+            return_exceptions=True
+        )
+    
+    async def _new_page(self, context):
+        """Open a pooled page with frame tracking attached"""
+        page = await context.new_page()
+        track_frames(page)
+        return page
+    
+    async def _release_page(self, page):
+        """Reset a page for the next application and return it to the pool"""
+        context = page.context
+        try:
+            await context.clear_cookies()
+            if page.is_closed():
+                page = await self._new_page(context)
+            else:
+                await page.goto('about:blank')
+        except Exception as e:
+            logger.warning(f"  ⚠️  Replacing pooled page: {e}")
+            try: await page.close()
+            except: pass
+            page = await self._new_page(context)
+        finally:
+            self._page_pool.put_nowait(page)
+    
+    async def get_resume(self, user_id: str, resume_url: str, filename_prefix: str) -> Optional[str]:
+        """Download a user's resume once per batch; concurrent applications await the same download"""
+        key = (user_id, hashlib.sha1(resume_url.encode()).hexdigest())
+        task = self._resume_cache.get(key)
+        if task is None:
+            task = asyncio.create_task(download_resume(resume_url, filename_prefix, subdir=key[1]))
+            self._resume_cache[key] = task
+        # Shielded so one application timing out doesn't cancel the others' download
+        resume_path = await asyncio.shield(task)
+        if resume_path is None and self._resume_cache.get(key) is task:
+            del self._resume_cache[key]  # let a later application retry
+        return resume_path
+    
+    def _remove_resumes(self):
+        """Delete the batch's downloaded resumes"""
+        for task in self._resume_cache.values():
+            if not task.done():
+                task.cancel()
+                continue
+            resume_path = None if task.cancelled() or task.exception() else task.result()
+            if resume_path and os.path.exists(resume_path):
+                try: os.remove(resume_path)
+                except: pass
+        self._resume_cache.clear()
+    
     async def close(self):
-        """Close browser"""
+        """Flush progress, then close browser, Playwright and the shared HTTP client"""
+        if self._progress_task:
+            self._progress_task.cancel()
+            self._progress_task = None
+        await flush_application_progress()
+        self._remove_resumes()
+        
         if self.browser:
             await self.browser.close()
+            self.browser = None
+            self._contexts = []
             logger.info("🌐 Browser closed")
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+        await close_http_client()
+    
+    async def _retry_step(self, page, step, name: str) -> bool:
+        """
+        Run a fill step up to FILL_ATTEMPTS times, letting the page settle between tries.
+        Only an explicit False or an exception is retried; a step returns None
+        when there is nothing to do on this form (e.g. no file input).
+        """
+        for attempt in range(FILL_ATTEMPTS):
+            try:
+                if await step() is not False:
+                    return True
+            except Exception as e:
+                if attempt == FILL_ATTEMPTS - 1:
+                    raise
+                logger.warning(f"  ⚠️  {name} failed: {e}")
+            if attempt == FILL_ATTEMPTS - 1:
+                break
+            logger.info(f"  🔁 Retrying {name} ({attempt + 2}/{FILL_ATTEMPTS})")
+            try:
+                await page.wait_for_load_state('networkidle', timeout=5000)
+            except PlaywrightTimeout:
+                pass
+            await asyncio.sleep(FILL_RETRY_BASE * 2 ** attempt)
+        return False
     
     async def human_delay(self, min_ms: int = 500, max_ms: int = 1500):
-        """Simulate human typing delay"""
-        import random
+        """Simulate human typing delay (skipped when HUMAN_DELAY=false)"""
+        if not HUMAN_DELAY_ENABLED:
+            return
         delay = random.uniform(min_ms, max_ms) / 1000
         await asyncio.sleep(delay)
     
@@ -462,47 +1357,39 @@ class SmartApplier:
         try:
             logger.info(f"  🔍 Looking for application form...")
             
-            # 1. Check for embedded iframes
-            iframe_selectors = [
-                'iframe[id="grnhse_iframe"]', 
-                'iframe[src*="greenhouse"]',
-                'iframe[src*="ashby"]',       
-                'iframe[src*="lever"]',
-                'iframe[id="gnewton_iframe"]'
-            ]
+            # 0. Known ATS URL: the form is on this page, just wait for it
+            for pattern, ats in KNOWN_ATS:
+                if pattern.search(page.url):
+                    try:
+                        await page.wait_for_selector(KNOWN_ATS_FORM_SELECTOR, timeout=8000)
+                        logger.info(f"  ✅ Known {ats} form URL")
+                        return True
+                    except PlaywrightTimeout:
+                        break
             
-            for selector in iframe_selectors:
-                if await page.locator(selector).count() > 0:
+            # 1. Check for embedded iframes
+            for selector in IFRAME_SELECTORS:
+                if await page.query_selector(selector):
                     logger.info(f"  ✅ Found embedded ATS form ({selector})")
                     return True
 
             async def is_form_present():
-                if await page.locator('form:visible').count() > 0: return True
-                if await page.locator('input[name="first_name"]').count() > 0: return True 
-                if await page.locator('input[name="name"]').count() > 0: return True       
-                for frame in safe_frames(page):
-                    if await frame.locator('input[type="file"]').count() > 0: return True
-                return False
+                found = await asyncio.gather(
+                    page.query_selector(FORM_PRESENT_SELECTOR),
+                    *[frame.query_selector('input[type="file"]') for frame in safe_frames(page)],
+                    return_exceptions=True
+                )
+                return any(el and not isinstance(el, BaseException) for el in found)
 
             if await is_form_present():
                 logger.info(f"  ✅ Found application form on page")
                 return True
             
             # 2. Click "Apply" buttons
-            apply_selectors = [
-                'a[data-mapped="true"]',        
-                'a:has-text("Apply to Job")',
-                'a:has-text("Apply Now")',
-                'button:has-text("Apply")',
-                'a:has-text("Apply")',
-                '[aria-label="Apply for this job"]',
-                '#apply_button'
-            ]
-            
-            for selector in apply_selectors:
+            for selector in APPLY_SELECTORS:
                 try:
-                    if await page.locator(selector).count() > 0:
-                        btn = page.locator(selector).first
+                    btn = await page.query_selector(selector)
+                    if btn:
                         if await btn.is_visible():
                             logger.info(f"  👆 Clicking: {selector}")
                             
@@ -513,20 +1400,14 @@ class SmartApplier:
                                 await btn.click()
                             
                             # Wait for form or iframe
-                            try:
-                                await page.wait_for_selector(
-                                    'input[type="file"], iframe[src*="greenhouse"], iframe[src*="lever"]',
-                                    timeout=5000
-                                )
-                            except:
-                                await page.wait_for_timeout(2000)
+                            await wait_for_mutation(page, FORM_READY_SELECTOR, 5000)
                             
                             if await is_form_present():
                                 logger.info(f"  ✅ Application form loaded")
                                 return True
                             
-                            for frame_sel in iframe_selectors:
-                                if await page.locator(frame_sel).count() > 0:
+                            for frame_sel in IFRAME_SELECTORS:
+                                if await page.query_selector(frame_sel):
                                     logger.info(f"  ✅ Found embedded form after click")
                                     return True
                 except:
@@ -542,68 +1423,41 @@ class SmartApplier:
     async def upload_resume(self, page, resume_path: str):
         """Upload resume (FIXED: Avoids cover letter fields)"""
         try:
-            # Gather all file inputs
-            all_file_inputs = await page.query_selector_all('input[type="file"]')
-            for frame in safe_frames(page):
-                try:
-                    all_file_inputs.extend(await frame.query_selector_all('input[type="file"]'))
-                except: continue
+            # Gather (context, index, name+id) for every file input, one evaluate per document
+            all_file_inputs = []
+            for ctx, metas in await evaluate_in_frames(page, _FILE_INPUTS_JS):
+                all_file_inputs.extend((ctx, i, meta['name'] or meta['id'], meta['name'] + meta['id']) for i, meta in enumerate(metas))
 
             if not all_file_inputs:
                 logger.warning("  ⚠️  No file upload field found")
-                return False
-            
-            # Strategy 1: Find RESUME-specific fields (strict keywords)
-            resume_keywords = ['resume', 'cv', 'attach_resume', 'curriculum']
-            cover_letter_keywords = ['cover', 'letter', 'motivation']
+                return None  # permanent for this form, not worth a retry
             
-            resume_fields = []
-            for file_input in all_file_inputs:
-                name_attr = (await file_input.get_attribute('name') or '').lower()
-                id_attr = (await file_input.get_attribute('id') or '').lower()
-                combined = name_attr + id_attr
-                
-                # Skip cover letter fields explicitly
-                if any(k in combined for k in cover_letter_keywords):
-                    logger.debug(f"  ⏭️  Skipping cover letter field: {name_attr or id_attr}")
-                    continue
-                
-                # Match resume fields
-                if any(k in combined for k in resume_keywords):
-                    resume_fields.append((file_input, name_attr or id_attr))
-            
-            # Upload to first resume-specific field
-            if resume_fields:
-                field, field_name = resume_fields[0]
-                await field.set_input_files(resume_path)
+            async def upload_to(ctx, index):
+                await ctx.locator('input[type="file"]').nth(index).set_input_files(resume_path)
                 await self.human_delay(2000, 3000)
-                logger.info(f"  ✅ Resume uploaded to: {field_name}")
-                return True
+            
+            # Skip cover letter fields explicitly
+            candidates = [f for f in all_file_inputs if not any(k in f[3] for k in COVER_KWS)]
+            
+            # Strategy 1: Upload to first RESUME-specific field (strict keywords)
+            for ctx, index, field_name, combined in candidates:
+                if any(k in combined for k in RESUME_KWS):
+                    await upload_to(ctx, index)
+                    logger.info(f"  ✅ Resume uploaded to: {field_name}")
+                    return True
             
             # Strategy 2: Fallback to first non-cover-letter field
-            for file_input in all_file_inputs:
-                name_attr = (await file_input.get_attribute('name') or '').lower()
-                id_attr = (await file_input.get_attribute('id') or '').lower()
-                combined = name_attr + id_attr
-                
-                # Skip cover letter fields
-                if any(k in combined for k in cover_letter_keywords):
-                    continue
-                
-                # Upload here
-                await file_input.set_input_files(resume_path)
-                await self.human_delay(2000, 3000)
+            if candidates:
+                ctx, index = candidates[0][:2]
+                await upload_to(ctx, index)
                 logger.info(f"  ✅ Resume uploaded to generic field (avoided cover letter)")
                 return True
             
             # Strategy 3: Last resort - use first field (warn user)
-            if all_file_inputs:
-                logger.warning("  ⚠️  Could not identify resume field, using first available")
-                await all_file_inputs[0].set_input_files(resume_path)
-                await self.human_delay(2000, 3000)
-                return True
-            
-            return False
+            logger.warning("  ⚠️  Could not identify resume field, using first available")
+            ctx, index = all_file_inputs[0][:2]
+            await upload_to(ctx, index)
+            return True
         
         except Exception as e:
             logger.error(f"  ❌ Error uploading resume: {e}")
@@ -615,41 +1469,46 @@ class SmartApplier:
             logger.info("  📝 Filling basic fields...")
             
             async def fill_anywhere(selectors, value):
+                # True once filled; False if a field matched but none could be
+                # filled (not rendered/enabled yet), None if nothing matched
+                # Query every (frame, selector) pair at once, then walk them in the old order
                 contexts = [page] + safe_frames(page)
-                for ctx in contexts:
-                    for selector in selectors:
+                pairs = [(ctx, selector) for ctx in contexts for selector in selectors]
+                results = await asyncio.gather(
+                    *[ctx.eval_on_selector_all(selector, _FILLABLE_FLAGS_JS) for ctx, selector in pairs],
+                    return_exceptions=True
+                )
+                found = False
+                for (ctx, selector), flags in zip(pairs, results):
+                    if isinstance(flags, BaseException): continue
+                    found = found or bool(flags)
+                    for i, fillable in enumerate(flags):
+                        if not fillable: continue
                         try:
-                            elements = await ctx.locator(selector).all()
-                            for el in elements:
-                                if await el.is_visible():
-                                    type_attr = (await el.get_attribute('type') or 'text').lower()
-                                    if type_attr in ['checkbox', 'radio', 'hidden', 'file', 'submit', 'button']:
-                                        continue
-                                    
-                                    await el.fill(value)
-                                    await self.human_delay()
-                                    return True
+                            await ctx.locator(selector).nth(i).fill(value)
+                            await self.human_delay()
+                            return True
                         except: continue
-                return False
-
-            await fill_anywhere([
-                'input[name*="first" i][name*="name" i]', 'input[id*="first" i]', 
-                '[autocomplete="given-name"]', 'input[name="name" i]'
-            ], user_data.get('firstName', ''))
+                return False if found else None
 
-            await fill_anywhere([
-                'input[name*="last" i]', 'input[id*="last" i]', 
-                '[autocomplete="family-name"]'
-            ], user_data.get('lastName', ''))
-
-            await fill_anywhere([
-                'input[type="email"]', 'input[name*="email" i]', '[autocomplete="email"]'
-            ], user_data.get('email', ''))
+            first_name = await fill_anywhere(FIRST_NAME_SELECTORS, user_data.get('firstName', ''))
+            last_name = await fill_anywhere(LAST_NAME_SELECTORS, user_data.get('lastName', ''))
+            email = await fill_anywhere(EMAIL_SELECTORS, user_data.get('email', ''))
 
             phone_formatted = format_phone_number(user_data.get('phone', ''))
-            await fill_anywhere([
-                'input[type="tel"]', 'input[name*="phone" i]', '[autocomplete="tel"]'
-            ], phone_formatted)
+            await fill_anywhere(PHONE_SELECTORS, phone_formatted)
+
+            # Email is always required; names only when the form has the field
+            missing = [
+                name for name, ok in (
+                    ('first name', first_name is not False),
+                    ('last name', last_name is not False),
+                    ('email', email is True),
+                ) if not ok
+            ]
+            if missing:
+                logger.warning(f"  ⚠️  Not filled: {', '.join(missing)}")
+                return False
 
             return True
         
@@ -660,120 +1519,53 @@ class SmartApplier:
     async def handle_custom_questions(self, page, user_data: Dict):
         """Handle custom application questions (Enhanced Fuzzy Matching)"""
         try:
-            await page.wait_for_timeout(2000)
+            await page.wait_for_load_state('domcontentloaded')
+            try:
+                await page.wait_for_selector('input, select, textarea', timeout=3000)
+            except PlaywrightTimeout:
+                pass
             
-            all_fields = await page.query_selector_all('input:visible, select, textarea:visible')
-            for frame in safe_frames(page):
-                try:
-                    frame_fields = await frame.query_selector_all('input:visible, select, textarea:visible')
-                    all_fields.extend(frame_fields)
-                except: continue
+            all_fields = await self._snapshot_fields(page)
             
             logger.info(f"  🔍 Analyzing {len(all_fields)} form fields...")
             questions_answered = 0
             
-            # Merge dashboard rules with defaults
-            linkedin_url = user_data.get('linkedinUrl', 'https://linkedin.com/in/chandratalluri')
-            if '/in/' not in linkedin_url:
-                username = linkedin_url.split('/')[-1] or 'chandratalluri'
-                linkedin_url = f'https://linkedin.com/in/{username}'
-
-            rules = {
-                'gender': 'Male', 
-                'race': 'Asian', 
-                'veteran': 'I am not a protected veteran',
-                'disability': 'No',
-                'authorized': 'Yes',
-                'sponsorship': 'No',
-                'relocate': 'Yes',
-                'remote': 'Yes',
-                'linkedin': linkedin_url,
-                'website': 'https://chandratalluri.com',
-                'portfolio': 'https://chandratalluri.com',
-                'github': 'https://github.com/chandratalluri',
-                'hear about': 'LinkedIn',
-            }
-            
-            if 'custom_rules' in user_data:
-                rules.update(user_data['custom_rules'])
-
-            for field in all_fields: 
-                try:
-                    tag_name = await field.evaluate('el => el.tagName.toLowerCase()')
-                    if tag_name != 'select':
-                        if not await field.is_visible(): continue
-
-                    try:
-                        val = await field.input_value()
-                        if val and len(val) > 0 and val != "0": continue
-                    except: pass
-                    
-                    # Find Label
-                    field_id = await field.get_attribute('id')
-                    label_text = ""
-                    
-                    if field_id:
-                        try:
-                            label_elem = await page.query_selector(f'label[for="{field_id}"]')
-                            if not label_elem:
-                                for frame in safe_frames(page):
-                                    label_elem = await frame.query_selector(f'label[for="{field_id}"]')
-                                    if label_elem: break
-                            if label_elem: label_text = await label_elem.inner_text()
-                        except: pass
-                    
-                    if not label_text:
-                        try:
-                            parent = await field.evaluate_handle('el => el.closest("div, fieldset, label")')
-                            if parent:
-                                label_text = await parent.inner_text()
-                                val_text = await field.evaluate('el => el.value')
-                                label_text = label_text.replace(val_text, '')
-                        except: pass
-                    
-                    if not label_text or len(label_text.strip()) < 3: continue
-                    
-                    label_clean = label_text.lower().strip()
-                    logger.info(f"  ❓ Question: {label_text[:60]}...")
-
-                    # Match Answer
-                    answer = None
-                    for keyword, rule_answer in rules.items():
-                        if keyword in label_clean:
-                            logger.info(f"    ⚡ Fast-Matched '{keyword}': {rule_answer}")
-                            answer = rule_answer
-                            break
-                    
-                    if not answer:
-                        answer = await answer_question_with_ai(label_text, user_data)
+            rules = build_question_rules(user_data)
 
+            # Pass 1: match snapshot labels against rules; AI questions are batched
+            questions = []
+            for ctx, info in all_fields:
+                label_text = info['label']
+                if not label_text or len(label_text.strip()) < 3: continue
+                
+                label_clean = label_text.lower().strip()
+                logger.info(f"  ❓ Question: {label_text[:60]}...")
+
+                # Match Answer
+                answer = None
+                hit = match_rule(rules, label_clean)
+                if hit:
+                    logger.info(f"    ⚡ Fast-Matched '{hit[0]}': {hit[1]}")
+                    answer = hit[1]
+                
+                questions.append((ctx, info, label_text, label_clean, answer))
+            
+            # One DeepSeek request for every question the rules didn't answer
+            ai_indexes = [i for i, q in enumerate(questions) if not q[4]]
+            if ai_indexes:
+                ai_answers = await answer_questions_batch([questions[i][2] for i in ai_indexes], user_data)
+                for i, answer in zip(ai_indexes, ai_answers):
+                    questions[i] = questions[i][:4] + (answer,)
+            
+            # Pass 2: fill fields
+            for ctx, info, label_text, label_clean, answer in questions:
+                try:
+                    field = ctx.locator(f'[data-ja-q="{info["key"]}"]').first
                     # Fill Field
-                    if tag_name == 'select':
+                    if info['tag'] == 'select':
                         try:
-                            options = await field.query_selector_all('option')
-                            best_match = None
-                            best_score = 0
-                            
-                            def similarity(a, b): return SequenceMatcher(None, a.lower(), b.lower()).ratio()
-
-                            for opt in options:
-                                opt_text = (await opt.inner_text()).strip()
-                                opt_val = await opt.get_attribute('value')
-                                if not opt_text or "select" in opt_text.lower(): continue
-                                
-                                score = similarity(answer, opt_text)
-                                
-                                if answer.lower() in opt_text.lower(): score += 0.3
-                                if opt_text.lower() in answer.lower(): score += 0.3
-
-                                if answer.lower() == 'yes' and any(w in opt_text.lower() for w in ['yes', 'authorized', 'eligible']): score = 1.0
-                                if answer.lower() == 'no' and any(w in opt_text.lower() for w in ['no', 'not', 'none']): score = 1.0
-
-                                if score > best_score:
-                                    best_score = score
-                                    best_match = opt_val
-
-                            if best_match and best_score > 0.4:
+                            best_match = best_option_value(answer, normalize_options(info['options']))
+                            if best_match:
                                 await field.select_option(value=best_match, force=True)
                             else:
                                 await field.select_option(index=1, force=True) 
@@ -791,8 +1583,8 @@ class SmartApplier:
                             questions_answered += 1
                         except: pass
                     
-                    elif tag_name == 'input' and (await field.get_attribute('type')) in ['radio', 'checkbox']:
-                        val = await field.get_attribute('value')
+                    elif info['tag'] == 'input' and info['type'] in ['radio', 'checkbox']:
+                        val = info['value']
                         should_click = False
                         if answer.lower() in ['yes', 'true'] and ('yes' in label_clean or (val and 'yes' in val.lower())): should_click = True
                         elif answer.lower() in ['no', 'false'] and ('no' in label_clean or (val and 'no' in val.lower())): should_click = True
@@ -818,22 +1610,20 @@ class SmartApplier:
             logger.error(f"  ⚠️  Error handling custom questions: {e}")
             return False
 
+    async def _snapshot_fields(self, page):
+        """Read every fillable field on the page and its frames, one evaluate per document"""
+        fields = []
+        for ctx, snapshot in await evaluate_in_frames(page, _SNAPSHOT_FIELDS_JS):
+            fields.extend((ctx, info) for info in snapshot)
+        return fields
+
     async def find_submit_button(self, page):
         """Find submit button"""
-        submit_selectors = [
-            'button#submit_app', 'input[type="submit"]', 'button[type="submit"]',
-            'button:has-text("Submit Application")', 'button:has-text("Submit")'
-        ]
-        
-        for selector in submit_selectors:
-            if await page.locator(selector).count() > 0: return page.locator(selector).first
-        
-        for frame in safe_frames(page):
-            for selector in submit_selectors:
-                try:
-                    if await frame.locator(selector).count() > 0: return frame.locator(selector).first
-                except: continue
-        return None
+        buttons = await asyncio.gather(
+            *[first_visible(ctx, SUBMIT_SELECTORS) for ctx in [page, *safe_frames(page)]],
+            return_exceptions=True
+        )
+        return next((b for b in buttons if b and not isinstance(b, BaseException)), None)
 
     async def submit_application_auto(self, page, app_id: str):
         """Fully automatic submission"""
@@ -844,12 +1634,19 @@ class SmartApplier:
                 return False
             
             await submit_button.click()
-            await page.wait_for_timeout(3000)
             
-            # Verify
-            confirmation_texts = ['submitted', 'thank you', 'received', 'success']
-            content = (await page.content()).lower()
-            if any(t in content for t in confirmation_texts):
+            # Verify: wait for confirmation text on the page, then check embedded forms' frames
+            try:
+                await page.wait_for_selector(CONFIRMATION_SELECTOR, timeout=8000)
+                confirmed = True
+            except PlaywrightTimeout:
+                counts = await asyncio.gather(
+                    *[frame.locator(CONFIRMATION_SELECTOR).count() for frame in safe_frames(page)],
+                    return_exceptions=True
+                )
+                confirmed = any(c and not isinstance(c, BaseException) for c in counts)
+            
+            if confirmed:
                 logger.info(f"  ✅ CONFIRMED: Application submitted!")
                 await page.screenshot(path=f"screenshot_confirmed_{app_id}.png")
                 return True
@@ -869,10 +1666,12 @@ class SmartApplier:
                 await submit_button.evaluate("el => el.style.border = '5px solid red'")
                 logger.info("  ✋ PAUSED for manual review")
             
-            print("\n" + "!"*60)
-            print(f"  ⚠️  FORM FILLED! Review and submit manually.")
-            print("!"*60)
-            await asyncio.to_thread(input, "  >> Press ENTER after submitting...")
+            async with self._review_lock:
+                await page.bring_to_front()
+                print("\n" + "!"*60)
+                print(f"  ⚠️  FORM FILLED! Review and submit manually.")
+                print("!"*60)
+                await asyncio.to_thread(input, "  >> Press ENTER after submitting...")
             return True
         except Exception as e:
             logger.error(f"Error in manual submission: {e}")
@@ -881,7 +1680,6 @@ class SmartApplier:
     async def process_application(self, app_data: Dict):
         """Process a single job application"""
         app_id = app_data['id']
-        resume_path = None
         
         try:
             job_url = app_data.get('jobUrl', '')
@@ -904,15 +1702,24 @@ class SmartApplier:
             if resume_url:
                 await update_application_progress(app_id, 'processing', 20, 'Downloading resume...')
                 clean_name = f"{user_data.get('firstName', 'Candidate')}_{user_data.get('lastName', 'Resume')}"
-                resume_path = await download_resume(resume_url, clean_name)
+                resume_path = await self.get_resume(user_id, resume_url, clean_name)
+            else:
+                resume_path = None
             
             # 3. Open Page
             await update_application_progress(app_id, 'processing', 30, f'Opening application...')
-            page = await self.context.new_page()
+            page = await self._page_pool.get()
             
             try:
-                await page.goto(job_url, wait_until='domcontentloaded', timeout=60000)
-                await page.wait_for_timeout(3000)
+                # Known questions are answered while the page loads
+                await asyncio.gather(
+                    page.goto(job_url, wait_until='domcontentloaded', timeout=60000),
+                    prefetch_answers(job_url, user_data)
+                )
+                try:
+                    await page.wait_for_selector(PAGE_READY_SELECTOR, timeout=8000)
+                except PlaywrightTimeout:
+                    pass
                 
                 # 4. Find Form
                 await update_application_progress(app_id, 'processing', 40, 'Finding form...')
@@ -923,16 +1730,16 @@ class SmartApplier:
                 
                 # 5. Basic Info
                 await update_application_progress(app_id, 'processing', 50, 'Filling info...')
-                await self.fill_basic_fields(page, user_data)
+                await self._retry_step(page, lambda: self.fill_basic_fields(page, user_data), 'basic fields')
                 
                 # 6. Upload Resume
                 if resume_path:
                     await update_application_progress(app_id, 'processing', 60, 'Uploading resume...')
-                    await self.upload_resume(page, resume_path)
+                    await self._retry_step(page, lambda: self.upload_resume(page, resume_path), 'resume upload')
                 
                 # 7. Questions
                 await update_application_progress(app_id, 'processing', 70, 'Answering questions...')
-                await self.handle_custom_questions(page, user_data)
+                await self._retry_step(page, lambda: self.handle_custom_questions(page, user_data), 'custom questions')
                 
                 # 8. Submit
                 auto_submit = user_data.get('autoSubmitEnabled', False)
@@ -954,17 +1761,12 @@ class SmartApplier:
                     return False
             
             finally:
-                await page.close()
+                await self._release_page(page)
         
         except Exception as e:
             await update_application_status(app_id, 'failed', str(e))
             self.stats['failed'] += 1
             return False
-        
-        finally:
-            if resume_path and os.path.exists(resume_path):
-                try: os.remove(resume_path)
-                except: pass
     
     async def run(self):
         """Main execution loop"""
@@ -976,12 +1778,21 @@ class SmartApplier:
                 logger.info("ℹ️  No pending applications")
                 return
             
-            for i, app in enumerate(applications, 1):
-                self.stats['processed'] += 1
-                await self.process_application(app)
-                if i < len(applications):
-                    logger.info("\n⏳ Waiting 5 seconds...")
-                    await asyncio.sleep(5)
+            semaphore = asyncio.Semaphore(MAX_CONCURRENT_APPLICATIONS)
+            
+            async def process_bounded(app):
+                async with semaphore:
+                    await ATS_LIMITER.acquire()
+                    self.stats['processed'] += 1
+                    try:
+                        return await asyncio.wait_for(self.process_application(app), timeout=APP_TIMEOUT_SECONDS)
+                    except asyncio.TimeoutError:
+                        logger.error(f"⏱️  Application {app['id']} timed out after {APP_TIMEOUT_SECONDS}s")
+                        await update_application_status(app['id'], 'failed', 'Timed out')
+                        self.stats['failed'] += 1
+                        return False
+            
+            await asyncio.gather(*[process_bounded(app) for app in applications])
             
             logger.info("\n" + "="*70)
             logger.info(f"📊 Stats: {self.stats['successful']} Success / {self.stats['failed']} Failed")
@@ -0,0 +1,39 @@
+"""
+=============================================================================
+JOBHUNT AI - RATE LIMITING
+Token buckets shared by the application engines
+=============================================================================
+"""
+
+import asyncio
+import random
+import time
+
+
+class AsyncTokenBucket:
+    """Token bucket shared by coroutines; waiters sleep outside the lock"""
+
+    def __init__(self, rate: float, capacity: float = 1.0, jitter: float = 0.0):
+        self.rate = rate  # tokens per second
+        self.capacity = capacity
+        self.jitter = jitter  # max random seconds added to each wait
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Take one token, waiting for the bucket to refill if it is empty"""
+        while True:
+            async with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            await asyncio.sleep(wait + random.uniform(0, self.jitter))
+
+
+# Politeness toward target ATS sites: one application start every 10 s
+ATS_LIMITER = AsyncTokenBucket(rate=0.1, jitter=2.0)